@@ -1,4 +1,18 @@
 import streamlit as st
+from dotenv import load_dotenv
+
+# The agents modules read their settings from the environment when imported
+load_dotenv()
+
+from agents import model_provider
+
+
+@st.cache_resource
+def warm_up_models():
+    """Load the Ollama models once per server process, before the first user reaches a chat page."""
+    model_provider.warmup_in_background()
+    return model_provider.latency_stats
+
 
 st.set_page_config(
     page_title="Hello",
@@ -8,6 +22,8 @@ st.set_page_config(
 st.write("# Welcome to RIASEC Carrer Recommendation! 👋")
 
 st.sidebar.success("Select a demo above.")
+for model, stats in warm_up_models().items():
+    st.sidebar.caption(f"{model}: first token {stats['warm']:.2f}s warm, {stats['cold']:.2f}s cold")
 
 st.markdown(
     """
@@ -0,0 +1,48 @@
+import json
+import os
+import time
+from agents import html_text
+from agents import vacancy_detail_cache
+from agents import vacancy_mirror
+
+# python -m agents.bench_html_text
+# Compares the installed HTML parsers on the vacancy descriptions and requirements we have stored locally.
+
+ROUNDS = 5
+
+
+def load_samples():
+    samples = []
+    if os.path.exists(vacancy_mirror.MIRROR_FILE):
+        connection = vacancy_mirror.connect()
+        try:
+            for row in connection.execute("SELECT raw FROM vacancies"):
+                vacancy = json.loads(row['raw'])
+                samples += [vacancy.get('description'), vacancy.get('requirement')]
+        finally:
+            connection.close()
+    for entry in vacancy_detail_cache.load_cache().values():
+        samples += [entry['vacancy'].get('description'), entry['vacancy'].get('requirement')]
+    return [sample for sample in samples if sample]
+
+
+def bench(name, parse, samples):
+    start_time = time.perf_counter()
+    for _ in range(ROUNDS):
+        for sample in samples:
+            parse(sample)
+    runtime = time.perf_counter() - start_time
+    print(f"{name:>16}: {1000 * runtime / (ROUNDS * len(samples)):.4f} ms per fragment")
+
+
+if __name__ == '__main__':
+    samples = load_samples()
+    if not samples:
+        print("No vacancy HTML found, run python -m agents.vacancy_mirror first.")
+    else:
+        print(f"{len(samples)} fragments, {sum(len(sample) for sample in samples) // len(samples)} characters on average, {ROUNDS} rounds")
+        for name, parse in html_text.available_parsers().items():
+            bench(name, parse, samples)
+        # The first round fills the cache, every following one is served from it
+        bench("memoized (auto)", html_text.html_to_text, samples)
+        print(f"Memoized cache: {html_text.stats['hits']} hits, {html_text.stats['misses']} misses")
@@ -0,0 +1,209 @@
+import time
+from agents import rating_agent
+from agents import rating_cache
+from agents import vacancy_liveness
+from agents.lexical_ranker import rate_positions_lexical
+from agents.riasec_affinity import rate_positions_by_riasec
+
+
+class FacetRanker:
+    """Keeps the rating of every job for each facet (a RIASEC type or a preference) of one session.
+
+    A ranking combines the facets it is asked for, so adding a preference only rates
+    that new facet while the facets rated earlier in the session are reused.
+    """
+
+    def __init__(self, mode=rating_agent.RATING_MODE, top_k=rating_agent.SHORTLIST_TOP_K,
+                 ollama_concurrency=rating_agent.OLLAMA_CONCURRENCY, time_budget=rating_agent.LLM_TIME_BUDGET,
+                 engine=rating_agent.RANKING_ENGINE):
+        if engine not in ("llm", "lexical"):
+            raise ValueError(f"Unknown ranking engine: {engine}")
+        self.mode = mode
+        self.top_k = top_k
+        self.ollama_concurrency = ollama_concurrency
+        self.time_budget = time_budget
+        self.engine = engine
+        self.slugs = None
+        # facet -> {slug: rating}
+        self.facet_ratings = {}
+        # facet -> {"live", "shortlist", "ratings", "rated"} of a facet iter_rank stopped rating early
+        self.partial_facets = {}
+
+    def rate_facet_lexical(self, facet, jobs):
+        positions = [str(position) for position in jobs["Position"]]
+        return dict(zip(self.slugs, rate_positions_lexical(facet, positions, rating_agent.get_descriptions(jobs))))
+
+    def rate_facet(self, facet, jobs):
+        """Rate every job of the catalog for one facet, jobs outside the shortlist get 0.
+
+        Returns the ratings and whether to keep them. Lexical fallback ratings are not kept,
+        so the LLM gets another try at the facet next time. With the lexical engine the
+        BM25 ratings are the real ones and are kept.
+        """
+        if self.engine == "lexical":
+            return self.rate_facet_lexical(facet, jobs), True
+        start_time = time.time()
+        hits, misses = rating_cache.stats["hits"], rating_cache.stats["misses"]
+        deadline = start_time + self.time_budget if self.time_budget else None
+        positions, live, shortlist = rating_agent.select_candidates(facet, jobs, self.top_k, deadline=deadline)
+        if shortlist is None:
+            print(f"No embedding shortlist for facet '{facet}', using the lexical ranking")
+            return self.rate_facet_lexical(facet, jobs), False
+        rated = rating_agent.rate_positions_within_budget(facet, [positions[i] for i in shortlist], self.mode, self.ollama_concurrency, deadline)
+        if rated is None:
+            print(f"Rating facet '{facet}' exceeded its {self.time_budget} second budget, using the lexical ranking")
+            return self.rate_facet_lexical(facet, jobs), False
+        ratings, llm_calls = rated
+        facet_ratings = dict.fromkeys(self.slugs, 0)
+        for i, rating in zip(shortlist, ratings):
+            facet_ratings[self.slugs[i]] = int(rating)
+        rating_agent.record_ranking_stats(self.mode, len(live), len(shortlist), llm_calls, hits, misses, start_time)
+        return facet_ratings, True
+
+    def prepare(self, facets, riasec_scores):
+        """Load the catalog and work out the facets to combine. Returns (jobs, slugs, facets, riasec_ratings)."""
+        jobs = rating_agent.load_xlsx_jobs()
+        slugs = tuple(link[35:] for link in jobs["Link"])
+        if slugs != self.slugs:
+            # The catalog changed, ratings of the old one can't be combined with it
+            self.slugs = slugs
+            self.facet_ratings = {}
+            self.partial_facets = {}
+
+        riasec_ratings = None
+        if riasec_scores:
+            riasec_ratings = rate_positions_by_riasec(riasec_scores, [str(position) for position in jobs["Position"]])
+            if riasec_ratings is None:
+                print("RIASEC affinity matrix does not cover the catalog, rating the top 3 types as facets")
+                facets = sorted(riasec_scores, key=riasec_scores.get, reverse=True)[:3] + list(facets)
+
+        facets = [facet for facet in dict.fromkeys(rating_cache.normalize_keyword(facet) for facet in facets) if facet]
+        print(f"Facets: {facets}, already rated: {[facet for facet in facets if facet in self.facet_ratings]}")
+        return jobs, slugs, facets, riasec_ratings
+
+    def add_facet_column(self, facet, jobs, slugs):
+        if facet not in self.facet_ratings:
+            facet_ratings, keep = self.rate_facet(facet, jobs)
+            if keep:
+                self.facet_ratings[facet] = facet_ratings
+                self.partial_facets.pop(facet, None)
+        else:
+            facet_ratings = self.facet_ratings[facet]
+        jobs[facet] = [facet_ratings[slug] for slug in slugs]
+
+    def combine(self, jobs, slugs, facets, riasec_ratings):
+        """The live jobs sorted by the mean of `facets` (plus the "riasec" column when given)."""
+        if riasec_ratings is not None:
+            jobs["riasec"] = riasec_ratings
+            facets = ["riasec"] + facets
+        if facets:
+            jobs["rating"] = jobs[facets].mean(axis=1)
+        jobs = jobs[[vacancy_liveness.is_live(slug) for slug in slugs]]
+        return jobs.sort_values(by="rating", ascending=False, kind="stable")
+
+    def rank(self, facets, riasec_scores=None):
+        """Return the live jobs sorted by the mean of their facet ratings, with one column per facet.
+
+        With `riasec_scores` ({type: total score}) the RIASEC part comes from the precomputed
+        affinity matrix as a single "riasec" facet, without any LLM call. If the matrix does
+        not cover the catalog, the top three types are rated as facets instead.
+        """
+        jobs, slugs, facets, riasec_ratings = self.prepare(facets, riasec_scores)
+        for facet in facets:
+            self.add_facet_column(facet, jobs, slugs)
+        return self.combine(jobs, slugs, facets, riasec_ratings)
+
+    def iter_rank(self, facets, riasec_scores=None, threshold=rating_agent.RATING_THRESHOLD, enough=None):
+        """Yield the rows of rank() progressively, like rating_agent.iter_relevant_jobs does for one keyword.
+
+        The facets rated before (and all but the last new one) are combined first. The last
+        new facet is then rated with the LLM in embedding similarity order, one batch (or
+        one round of concurrent calls) at a time, and a job is yielded as soon as its
+        combined rating reaches `threshold`. The generator stops after `enough` rows. When
+        the candidates run out, the rest follows best first. When the consumer stops early,
+        the ratings of the facet so far are kept in `partial_facets` and the next call
+        resumes from them, the facet is only kept for good once its shortlist is rated. Once
+        `time_budget` is used up (embedding the shortlist included) the facet is finished
+        lexically for this call.
+        """
+        jobs, slugs, facets, riasec_ratings = self.prepare(facets, riasec_scores)
+        new_facets = [facet for facet in facets if facet not in self.facet_ratings]
+        progressive = new_facets[-1] if new_facets and self.engine == "llm" else None
+        known = [facet for facet in facets if facet != progressive]
+        for facet in known:
+            self.add_facet_column(facet, jobs, slugs)
+        if progressive is None:
+            ranked = self.combine(jobs, slugs, known, riasec_ratings)
+            for _, job in (ranked if enough is None else ranked.head(enough)).iterrows():
+                yield job
+            return
+
+        start_time = time.time()
+        hits, misses = rating_cache.stats["hits"], rating_cache.stats["misses"]
+        deadline = start_time + self.time_budget if self.time_budget else None
+        partial = self.partial_facets.get(progressive)
+        if partial is None:
+            positions, live, shortlist = rating_agent.select_candidates(progressive, jobs, self.top_k, ordered=True, deadline=deadline)
+            if shortlist is None:
+                print(f"No embedding shortlist for facet '{progressive}', using the lexical ranking")
+                lexical = self.rate_facet_lexical(progressive, jobs)
+                jobs[progressive] = [lexical[slug] for slug in slugs]
+                ranked = self.combine(jobs, slugs, known + [progressive], riasec_ratings)
+                for _, job in (ranked if enough is None else ranked.head(enough)).iterrows():
+                    yield job
+                return
+            partial = {"live": live, "shortlist": shortlist, "ratings": dict.fromkeys(slugs, 0), "rated": 0}
+            self.partial_facets[progressive] = partial
+        else:
+            # An earlier search stopped before the whole shortlist was rated, carry on from there
+            print(f"Resuming facet '{progressive}' after {partial['rated']} of {len(partial['shortlist'])} rated jobs")
+            positions = [str(position) for position in jobs["Position"]]
+        live, shortlist, facet_ratings = partial["live"], partial["shortlist"], partial["ratings"]
+        chunk_size = rating_agent.BATCH_SIZE if self.mode == "batch" else max(1, self.ollama_concurrency)
+        # The jobs rated by an earlier search come first, as one chunk that needs no LLM call
+        chunks = [(shortlist[:partial["rated"]], False)] if partial["rated"] else []
+        chunks += [(shortlist[start:start + chunk_size], True) for start in range(partial["rated"], len(shortlist), chunk_size)]
+        column = facet_ratings
+        yielded = set()
+        llm_calls = 0
+        rated = 0
+        try:
+            for chunk, unrated in chunks:
+                if unrated:
+                    chunk_rated = rating_agent.rate_positions_within_budget(progressive, [positions[i] for i in chunk], self.mode, self.ollama_concurrency, deadline)
+                    if chunk_rated is None:
+                        print(f"Rating facet '{progressive}' exceeded its {self.time_budget} second budget, finishing it with the lexical ranking")
+                        lexical = self.rate_facet_lexical(progressive, jobs)
+                        column = dict(facet_ratings)
+                        for i in shortlist[partial["rated"]:]:
+                            column[slugs[i]] = lexical[slugs[i]]
+                        break
+                    ratings, calls = chunk_rated
+                    llm_calls += calls
+                    rated += len(chunk)
+                    for i, rating in zip(chunk, ratings):
+                        facet_ratings[slugs[i]] = int(rating)
+                    partial["rated"] += len(chunk)
+                jobs[progressive] = [facet_ratings[slug] for slug in slugs]
+                combined = self.combine(jobs.iloc[chunk].copy(), [slugs[i] for i in chunk], known + [progressive], None if riasec_ratings is None else [riasec_ratings[i] for i in chunk])
+                for index, job in combined.iterrows():
+                    if job["rating"] < threshold:
+                        continue
+                    yield job
+                    yielded.add(index)
+                    if enough is not None and len(yielded) >= enough:
+                        return
+            if partial["rated"] == len(shortlist):
+                self.facet_ratings[progressive] = facet_ratings
+                del self.partial_facets[progressive]
+            jobs[progressive] = [column[slug] for slug in slugs]
+            ranked = self.combine(jobs, slugs, known + [progressive], riasec_ratings)
+            for index, job in ranked.iterrows():
+                if index in yielded:
+                    continue
+                yield job
+                yielded.add(index)
+                if enough is not None and len(yielded) >= enough:
+                    return
+        finally:
+            rating_agent.record_ranking_stats(self.mode, len(live), rated, llm_calls, hits, misses, start_time)
@@ -0,0 +1,84 @@
+import hashlib
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+try:
+    import lxml
+except ImportError:
+    lxml = None
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+# "auto" uses the first installed parser in the fixed order selectolax, lxml, html.parser, regex.
+# The order follows the usual speed of these parsers, measure yours with python -m agents.bench_html_text
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")
+HTML_CACHE_SIZE = int(os.getenv("HTML_CACHE_SIZE", 4096))
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+TAG = re.compile(r"<(script|style)\b.*?</\1\s*>|<!--.*?-->|<[^>]+>", re.IGNORECASE | re.DOTALL)
+
+
+def bs4_text(content, parser):
+    return BeautifulSoup(content, parser).get_text()
+
+
+def regex_text(content):
+    return html.unescape(TAG.sub("", content))
+
+
+def selectolax_text(content):
+    body = HTMLParser(content).body
+    return body.text() if body is not None else ""
+
+
+def available_parsers():
+    """Returns {name: function(html) -> text} for the parsers that are installed."""
+    parsers = {}
+    if HTMLParser is not None:
+        parsers["selectolax"] = selectolax_text
+    if BeautifulSoup is not None and lxml is not None:
+        parsers["lxml"] = lambda content: bs4_text(content, "lxml")
+    if BeautifulSoup is not None:
+        parsers["html.parser"] = lambda content: bs4_text(content, "html.parser")
+    parsers["regex"] = regex_text
+    return parsers
+
+
+def get_parser(name=HTML_PARSER):
+    parsers = available_parsers()
+    if name == "auto":
+        return next(iter(parsers.values()))
+    if name not in parsers:
+        raise ValueError(f"HTML parser {name} is not installed, available: {', '.join(parsers)}")
+    return parsers[name]
+
+
+def html_to_text(content, parser=HTML_PARSER):
+    """Returns the text of an HTML fragment ('' for None), memoized by content hash."""
+    if not content:
+        return ""
+    key = (parser, hashlib.sha1(content.encode("utf-8")).hexdigest())
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            stats["hits"] += 1
+            return _cache[key]
+    text = get_parser(parser)(content)
+    with _lock:
+        stats["misses"] += 1
+        _cache[key] = text
+        if len(_cache) > HTML_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return text
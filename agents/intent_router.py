@@ -0,0 +1,166 @@
+import os
+import re
+import threading
+import numpy as np
+from agents.model_provider import get_embed_model
+
+# Routes Search page messages before they reach the ReActAgent:
+#   "small_talk"  greetings, thanks, chit-chat -> one plain LLM completion, no tools
+#   "tools"       anything about jobs, vacancies or courses -> the ReActAgent
+# Preferences stated in the message ("saya suka desain grafis") are extracted by rules either way.
+
+# Minimum cosine similarity to the closest small talk example, and how much closer it must be than the closest tool example
+SMALL_TALK_THRESHOLD = float(os.getenv("SMALL_TALK_THRESHOLD", 0.7))
+SMALL_TALK_MARGIN = float(os.getenv("SMALL_TALK_MARGIN", 0.05))
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "True").lower() in ("1", "true", "yes")
+
+SMALL_TALK_WORDS = (
+    r"(hi+|halo+|hallo+|hello+|hey+|hai+|pagi|siang|sore|malam|selamat (pagi|siang|sore|malam)|"
+    r"thanks?( you)?( so much| a lot)?|thank u|thx|ty|terima ?kasih( banyak)?|makasih( banyak)?|trims|"
+    r"ok(e|ay)?|oke+|sip+|siap|mantap|keren|nice|great|cool|good|bagus|baik|"
+    r"bye|goodbye|dadah?|sampai jumpa|see you|ya|yah|kak|min|bro|sis|banget|sekali|deh|dong)"
+)
+# Messages made of small talk words only, e.g. "ok makasih ya kak!"
+SMALL_TALK_PATTERN = re.compile(rf"^{SMALL_TALK_WORDS}([\s,]+{SMALL_TALK_WORDS})*[\s!.?😊🙏👍]*$", re.IGNORECASE)
+
+# "saya suka X", "I'm interested in X", ... X runs until the end of the clause
+PREFERENCE_PATTERN = re.compile(
+    r"\b(?:i(?: really| also)? (?:like|love|enjoy|prefer)|i(?:'m| am)(?: really| also)? (?:interested in|into|passionate about|good at)|"
+    r"i want to (?:work (?:in|as|with|on)|be(?:come)? an?)|i would like to work (?:in|as|with|on)|"
+    r"(?:saya|aku|gue|gw)(?: sangat| juga| lebih)? (?:suka|senang|menyukai|minat|berminat|tertarik)(?: dengan| di| pada| ke| sama| dalam)?(?: bidang)?|"
+    r"(?:saya|aku|gue|gw)(?: juga)? (?:mau|ingin|pengen|pingin) (?:kerja|bekerja|jadi|menjadi)(?: di| sebagai)?(?: bidang)?)\s+"
+    r"(?P<preference>[^.,;!?\n]+)",
+    re.IGNORECASE,
+)
+# Words that end a preference phrase, e.g. "desain grafis tapi ..."
+PREFERENCE_STOP = re.compile(r"\s+(?:but|so|because|tapi|tetapi|namun|karena|soalnya|jadi|yang)\s+.*$", re.IGNORECASE)
+# Words that join several preferences, e.g. "data analysis and remote work"
+PREFERENCE_JOIN = re.compile(r"\s+(?:and|or|dan|atau|serta|&)\s+", re.IGNORECASE)
+PREFERENCE_MAX_WORDS = 5
+# Phrases pointing at a job shown earlier, e.g. "the first one", "job number 2", "yang pertama", "lowongan nomor tiga"
+PREFERENCE_REFERENCE = re.compile(
+    r"^yang\b|\b\d+\b|\b(?:first|second|third|fourth|fifth|last|previous|next|above|number|"
+    r"pertama|kedua|ketiga|keempat|kelima|terakhir|sebelumnya|tadi|atas|nomor)\b|"
+    r"\b(?:job|jobs|vacancy|lowongan|pekerjaan|loker)\s+(?:#\s*)?(?:one|two|three|four|five|satu|dua|tiga|empat|lima)\b",
+    re.IGNORECASE,
+)
+# A phrase made only of these words refers back to the chat instead of naming a preference, e.g. "I like it, thanks"
+PREFERENCE_IGNORED_WORDS = {
+    "it", "that", "this", "these", "those", "them", "one", "ones", "you", "your", "yours", "the", "a", "an",
+    "very", "so", "too", "much", "lot", "all", "more", "thing", "things", "idea", "answer", "suggestion", "suggestions",
+    "itu", "ini", "dia", "nya", "mereka", "kamu", "anda", "semua", "banget", "sekali", "juga", "deh", "dong", "sih", "ya",
+    "tersebut", "jawaban", "saran", "sarannya", "jawabannya",
+}
+
+SMALL_TALK_EXAMPLES = [
+    "hello", "good morning", "thanks a lot", "that's all, bye", "how are you?", "who are you?",
+    "halo kak", "apa kabar?", "terima kasih banyak ya", "oke makasih", "kamu siapa?", "sampai jumpa",
+]
+TOOL_EXAMPLES = [
+    "what jobs fit me?", "find me a job in Surabaya", "show me other vacancies", "are there any remote jobs?",
+    "tell me more about the first job", "what are the requirements of that job?", "recommend a course for me",
+    "carikan lowongan kerja yang cocok", "ada lowongan di Jakarta?", "lowongan lain dong", "detail pekerjaan nomor 2",
+    "rekomendasi kursus untuk saya", "saya ingin belajar data analysis", "pekerjaan apa yang cocok untuk RIASEC saya?",
+]
+
+_prototypes = None
+_lock = threading.Lock()
+stats = {"small_talk": 0, "tools": 0}
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def load_prototypes():
+    """Embed the example messages once per process."""
+    global _prototypes
+    with _lock:
+        if _prototypes is None:
+            embed_model = get_embed_model()
+            _prototypes = (
+                normalize_rows(np.array(embed_model.get_text_embedding_batch(SMALL_TALK_EXAMPLES), dtype=np.float32)),
+                normalize_rows(np.array(embed_model.get_text_embedding_batch(TOOL_EXAMPLES), dtype=np.float32)),
+            )
+        return _prototypes
+
+
+def extract_preferences(message):
+    """Return the job preferences stated in `message`, e.g. "I like data analysis" -> ["data analysis"].
+
+    Phrases that only point back at the chat, like "I like it, thanks" or "I like the first
+    one", are not preferences.
+    """
+    preferences = []
+    for match in PREFERENCE_PATTERN.finditer(message):
+        for preference in PREFERENCE_JOIN.split(PREFERENCE_STOP.sub("", match.group("preference"))):
+            preference = preference.strip(" '\"").lower()
+            words = preference.split()
+            if not words or len(words) > PREFERENCE_MAX_WORDS or "riasec" in preference:
+                continue
+            if all(word in PREFERENCE_IGNORED_WORDS for word in words) or PREFERENCE_REFERENCE.search(preference):
+                continue
+            if preference not in preferences:
+                preferences.append(preference)
+    return preferences
+
+
+def classify(message):
+    """Return "small_talk" or "tools" with the similarity of the closest example, using the embedding prototypes."""
+    small_talk, tools = load_prototypes()
+    query = normalize_rows(np.array(get_embed_model().get_query_embedding(message), dtype=np.float32))
+    small_talk_similarity = float(np.max(small_talk @ query))
+    tools_similarity = float(np.max(tools @ query))
+    if small_talk_similarity >= SMALL_TALK_THRESHOLD and small_talk_similarity - tools_similarity >= SMALL_TALK_MARGIN:
+        return "small_talk", small_talk_similarity
+    return "tools", tools_similarity
+
+
+def route(message):
+    """Decide how to answer `message`. Returns (intent, preferences).
+
+    A stated preference always goes to the tools, so the agent can search with it. Rules
+    catch obvious small talk for free, the embedding classifier decides the rest. If the
+    embedding model is unavailable the message goes to the tools, like before the router.
+    """
+    preferences = extract_preferences(message) if INTENT_ROUTER_ENABLED else []
+    if not INTENT_ROUTER_ENABLED or preferences:
+        intent = "tools"
+    elif SMALL_TALK_PATTERN.match(message.strip()):
+        intent = "small_talk"
+    else:
+        try:
+            intent, similarity = classify(message)
+            print(f"Intent '{intent}' ({similarity:.3f}) for: {message}")
+        except Exception as e:
+            print(f"Intent classification failed, using the tools: {e}")
+            intent = "tools"
+    stats[intent] += 1
+    return intent, preferences
+
+
+if __name__ == '__main__':
+    # python -m agents.intent_router
+    # Checks the preference rules on stated preferences and on replies that only look like one.
+    examples = {
+        "I like data analysis": ["data analysis"],
+        "Saya suka desain grafis tapi tidak suka coding": ["desain grafis"],
+        "I am interested in machine learning and remote work": ["machine learning", "remote work"],
+        "saya ingin bekerja di bidang marketing": ["marketing"],
+        "I like it, thanks": [],
+        "I love that": [],
+        "I like it a lot!": [],
+        "saya suka itu": [],
+        "aku suka banget": [],
+        "I like the first one": [],
+        "I am interested in job number 2": [],
+        "saya suka yang pertama": [],
+        "saya tertarik dengan lowongan nomor 3": [],
+        "saya tertarik dengan lowongan dua": [],
+        "I like 3d animation": ["3d animation"],
+    }
+    for message, expected in examples.items():
+        assert extract_preferences(message) == expected, f"{message!r}: {extract_preferences(message)} != {expected}"
+    print(f"{len(examples)} preference examples pass")
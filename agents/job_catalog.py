@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+directory = './cache'
+if not os.path.exists(directory):
+    os.makedirs(directory)
+JOBS_FILE = 'pages/jobs.xlsx'
+CATALOG_CACHE_FILE = './cache/job_catalog.npz'
+
+# path -> (signature, DataFrame), so the spreadsheet is read at most once per process and change
+_catalogs = {}
+_lock = threading.Lock()
+
+def file_sha1(file_path):
+    sha1 = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+def file_signature(file_path):
+    stat = os.stat(file_path)
+    return {'source': file_path, 'mtime': stat.st_mtime, 'size': stat.st_size}
+
+def normalize_text_columns(data):
+    """Text columns hold plain strings, missing cells become "". This is how the catalog is served from the cache too."""
+    data = data.copy()
+    for column in data.columns:
+        if data[column].dtype == object or pd.api.types.is_string_dtype(data[column]):
+            data[column] = data[column].fillna("").astype(str).astype(object)
+    return data
+
+def save_npz(data, signature, cache_file):
+    """Store every column as its own array. Text columns become fixed-width unicode arrays, so no pickling is needed."""
+    columns = {}
+    for i, column in enumerate(data.columns):
+        values = data[column]
+        if values.dtype == object:
+            columns[f"col_{i}"] = values.to_numpy(dtype=str)
+        else:
+            columns[f"col_{i}"] = values.to_numpy()
+    meta = dict(signature, columns=[str(column) for column in data.columns])
+    np.savez(cache_file, __meta__=np.array(json.dumps(meta)), **columns)
+
+def load_npz(cache_file):
+    with np.load(cache_file) as cached:
+        meta = json.loads(str(cached['__meta__']))
+        data = pd.DataFrame({column: cached[f"col_{i}"] for i, column in enumerate(meta['columns'])})
+    for column in data.columns:
+        if data[column].dtype.kind == 'U':
+            data[column] = data[column].astype(object)
+    return data, meta
+
+def load_job_catalog(file_path=JOBS_FILE, cache_file=None):
+    """Return the job catalog as a DataFrame.
+
+    The spreadsheet is converted to `cache_file` (CATALOG_CACHE_FILE by default) once and
+    only parsed again when its size/mtime and content hash change. Callers get a copy they
+    are free to modify.
+    """
+    cache_file = cache_file or CATALOG_CACHE_FILE
+    with _lock:
+        signature = file_signature(file_path)
+        memoized = _catalogs.get(file_path)
+        if memoized is not None and memoized[0] == signature:
+            return memoized[1].copy()
+
+        data = None
+        if os.path.exists(cache_file):
+            try:
+                data, meta = load_npz(cache_file)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Job catalog cache is invalid ({e}). Rebuilding.")
+            else:
+                same_file = meta['source'] == file_path and meta['size'] == signature['size']
+                if not same_file or (meta['mtime'] != signature['mtime'] and meta.get('sha1') != file_sha1(file_path)):
+                    data = None
+
+        if data is None:
+            print(f"Converting {file_path} to {cache_file}")
+            data = normalize_text_columns(pd.read_excel(file_path))
+            save_npz(data, dict(signature, sha1=file_sha1(file_path)), cache_file)
+
+        _catalogs[file_path] = (signature, data)
+        return data.copy()
+
+
+if __name__ == '__main__':
+    # python -m agents.job_catalog
+    # Checks that the catalog served from the cache file is the same as the spreadsheet.
+    import tempfile
+    expected = normalize_text_columns(pd.read_excel(JOBS_FILE))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_file = os.path.join(temp_dir, 'job_catalog.npz')
+        built = load_job_catalog(JOBS_FILE, cache_file)
+        _catalogs.clear()
+        cached = load_job_catalog(JOBS_FILE, cache_file)
+    pd.testing.assert_frame_equal(built, expected)
+    pd.testing.assert_frame_equal(cached, expected)
+    print(f"{JOBS_FILE}: {len(cached)} jobs round-trip through the catalog cache")
@@ -0,0 +1,90 @@
+import json
+import os
+import numpy as np
+from agents.job_catalog import file_sha1
+from agents.model_provider import EMBED_MODEL, get_embed_model
+
+directory = './cache'
+if not os.path.exists(directory):
+    os.makedirs(directory)
+EMBEDDINGS_FILE = './cache/job_position_embeddings.npy'
+EMBEDDINGS_META_FILE = './cache/job_position_embeddings.json'
+
+_matrix = None
+_matrix_meta = None
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+def load_meta():
+    """Load the metadata describing which spreadsheet the matrix on disk was built from."""
+    if os.path.exists(EMBEDDINGS_META_FILE) and os.path.exists(EMBEDDINGS_FILE):
+        try:
+            with open(EMBEDDINGS_META_FILE, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            print("Embedding metadata is invalid JSON. Rebuilding matrix.")
+    return {}
+
+def is_meta_valid(meta, source_path, positions):
+    if meta.get('model') != EMBED_MODEL or meta.get('count') != len(positions):
+        return False
+    stat = os.stat(source_path)
+    if meta.get('mtime') == stat.st_mtime and meta.get('size') == stat.st_size:
+        return True
+    # mtime changes on copy/checkout, so only rebuild when the content changed too
+    return meta.get('sha1') == file_sha1(source_path)
+
+def build_position_embeddings(positions, source_path):
+    """Embed every position and persist the normalized matrix next to its metadata."""
+    print(f"Building position embeddings for {len(positions)} jobs from {source_path}")
+    matrix = normalize_rows(np.array(get_embed_model().get_text_embedding_batch(positions), dtype=np.float32))
+    np.save(EMBEDDINGS_FILE, matrix)
+    stat = os.stat(source_path)
+    meta = {
+        'source': source_path,
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'sha1': file_sha1(source_path),
+        'model': EMBED_MODEL,
+        'count': len(positions),
+    }
+    with open(EMBEDDINGS_META_FILE, 'w') as f:
+        json.dump(meta, f)
+    return matrix, meta
+
+def load_position_embeddings(positions, source_path):
+    """Return the embedding matrix for `positions`, rebuilding it when the spreadsheet changed."""
+    global _matrix, _matrix_meta
+    if _matrix is not None and is_meta_valid(_matrix_meta, source_path, positions):
+        return _matrix
+    meta = load_meta()
+    if meta and is_meta_valid(meta, source_path, positions):
+        _matrix, _matrix_meta = np.load(EMBEDDINGS_FILE), meta
+    else:
+        _matrix, _matrix_meta = build_position_embeddings(positions, source_path)
+    return _matrix
+
+def position_similarities(keyword, positions, source_path):
+    matrix = load_position_embeddings(positions, source_path)
+    query = normalize_rows(np.array(get_embed_model().get_query_embedding(keyword), dtype=np.float32))
+    return matrix @ query
+
+def shortlist_positions(keyword, positions, source_path, top_k, candidates=None):
+    """Return the indices of the `top_k` positions closest to `keyword`, best first.
+
+    `candidates` optionally restricts the shortlist to these indices of `positions`.
+    """
+    similarities = position_similarities(keyword, positions, source_path)
+    if candidates is not None:
+        candidates = np.asarray(candidates, dtype=int)
+        masked = np.full(len(positions), -np.inf, dtype=np.float32)
+        masked[candidates] = similarities[candidates]
+        similarities = masked
+    top_k = min(top_k, len(positions) if candidates is None else len(candidates))
+    if top_k <= 0:
+        return []
+    top = np.argpartition(-similarities, top_k - 1)[:top_k]
+    return top[np.argsort(-similarities[top])].tolist()
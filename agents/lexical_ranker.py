@@ -0,0 +1,79 @@
+import csv
+import math
+import re
+import threading
+from collections import Counter
+
+RIASEC_KEYWORDS_FILE = 'docs/RIASEC Keywords.csv'
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+_riasec_terms = None
+# (positions, descriptions) -> index, the catalog only changes with jobs.xlsx
+_indexes = {}
+_lock = threading.Lock()
+
+def tokenize(text):
+    return re.findall(r"[a-z0-9]+", str(text).lower())
+
+def load_riasec_terms():
+    """Map each RIASEC type name to the O*NET keywords of that type, used to expand type names in a query."""
+    global _riasec_terms
+    if _riasec_terms is None:
+        _riasec_terms = {}
+        with open(RIASEC_KEYWORDS_FILE, newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                _riasec_terms.setdefault(row['Element Name'].lower(), []).extend(tokenize(row['Keyword']))
+    return _riasec_terms
+
+def expand_query(keyword):
+    terms = []
+    riasec_terms = load_riasec_terms()
+    for term in str(keyword).split(","):
+        term = term.strip().lower()
+        terms += riasec_terms.get(term, tokenize(term))
+    return terms
+
+class BM25Index:
+    def __init__(self, documents):
+        self.documents = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(document.values()) for document in self.documents]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.documents else 0
+        document_frequency = Counter(term for document in self.documents for term in document)
+        self.idf = {
+            term: math.log(1 + (len(self.documents) - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def scores(self, terms):
+        scores = []
+        for document, length in zip(self.documents, self.lengths):
+            score = 0.0
+            for term in terms:
+                frequency = document.get(term)
+                if frequency:
+                    norm = K1 * (1 - B + B * length / (self.average_length or 1))
+                    score += self.idf[term] * frequency * (K1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+def get_index(positions, descriptions=None):
+    key = (tuple(positions), tuple(descriptions) if descriptions is not None else None)
+    with _lock:
+        if key not in _indexes:
+            if descriptions is None:
+                documents = positions
+            else:
+                # Position names count twice so a title match beats a passing mention in the description
+                documents = [f"{position} {position} {description or ''}" for position, description in zip(positions, descriptions)]
+            _indexes[key] = BM25Index(documents)
+        return _indexes[key]
+
+def rate_positions_lexical(keyword, positions, descriptions=None):
+    """Rate every position 0 - 100 by BM25 against the keyword, RIASEC type names are expanded to their keywords."""
+    scores = get_index(positions, descriptions).scores(expand_query(keyword))
+    best = max(scores, default=0)
+    if best <= 0:
+        return [0] * len(positions)
+    return [int(round(100 * score / best)) for score in scores]
@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import nest_asyncio
+from typing import Any
+from llama_index.core import Settings
+from llama_index.core.agent import ReActAgent
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse, CompletionResponse, LLMMetadata, MessageRole
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.llms import CustomLLM
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+from agents import job_catalog
+from agents import petra_client
+from agents import vacancy_detail_cache
+from agents import vacancy_liveness
+from agents import vacancy_mirror
+from agents.facet_ranker import FacetRanker
+from agents.search_tools import SearchSession, build_tools
+from agents.summary_memory import RollingSummaryMemory
+
+# python -m agents.load_test_search --sessions 1,2,4,8,16 --turns 3
+# Drives concurrent Search page sessions through the ReActAgent and its five tools, with a
+# scripted LLM and the stand-in Petra API (fetch/petra_stub_server.py), and reports turn
+# latency percentiles, throughput and peak memory for every number of sessions.
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fetch'))
+from petra_stub_server import create_app, serve_in_background
+
+nest_asyncio.apply()
+
+# The user turns of a session, cycled through. Each one maps to the tool calls the fake LLM makes.
+SCRIPT = [
+    ("Saya suka data analysis", [("record_new_preference", {"preference": "data analysis"}), ("search_job_vacancy", {})]),
+    ("Tell me more about the first job", [("get_job_details", None)]),
+    ("Any courses I could take?", [("provide_topic_for_educational_content", {}), ("search_educational_content", {"topic": "data analysis"})]),
+    ("Terima kasih!", []),
+]
+
+RIASEC_RESULT = pd.DataFrame({
+    'Type': ['Realistic', 'Investigative', 'Artistic', 'Social', 'Enterprising', 'Conventional'],
+    'Total Score': [12, 30, 18, 22, 15, 27],
+})
+
+
+class FakeReActLLM(CustomLLM):
+    """Scripted stand-in for Ollama that answers in the ReAct format after a fixed delay.
+
+    The next step is picked from the last user message and the number of observations after it,
+    so every session of the load test walks through the same tool calls as SCRIPT.
+    """
+
+    first_token_latency: float = 0.5
+    token_latency: float = 0.01
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(context_window=32768, num_output=512, is_chat_model=True, model_name="fake-react")
+
+    def next_step(self, messages):
+        observations = []
+        user_message = ""
+        for message in reversed(messages):
+            content = message.content or ""
+            if message.role == MessageRole.USER and content.startswith("Observation:"):
+                observations.insert(0, content)
+            elif message.role == MessageRole.USER:
+                user_message = content
+                break
+        actions = next((actions for text, actions in SCRIPT if text == user_message), [])
+        if len(observations) < len(actions):
+            name, arguments = actions[len(observations)]
+            if arguments is None:
+                # get_job_details takes the slug of the first vacancy shown earlier in the chat
+                links = re.findall(r"alumni\.petra\.ac\.id/vacancy/([\w-]+)", "\n".join(m.content or "" for m in messages))
+                arguments = {"job_slug": links[0] if links else "unknown"}
+            return f"Thought: The current language of the user is: English. I need to use a tool to help me answer the question.\nAction: {name}\nAction Input: {json.dumps(arguments)}"
+        # Like the real agent, the answer repeats the links it was given
+        links = re.findall(r"https://alumni\.petra\.ac\.id/vacancy/[\w-]+", "\n".join(observations))
+        return "Thought: I can answer without using any more tools. I'll use the user's language to answer\nAnswer: Here is what I found for you, based on your RIASEC result. " + " ".join(links)
+
+    def tokens(self, text):
+        time.sleep(self.first_token_latency)
+        for i, token in enumerate(re.findall(r"\S+\s*|\s+", text)):
+            if i:
+                time.sleep(self.token_latency)
+            yield token
+
+    @llm_chat_callback()
+    def chat(self, messages, **kwargs: Any) -> ChatResponse:
+        text = "".join(self.tokens(self.next_step(messages)))
+        return ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=text))
+
+    @llm_chat_callback()
+    def stream_chat(self, messages, **kwargs: Any):
+        def gen():
+            text = ""
+            for token in self.tokens(self.next_step(messages)):
+                text += token
+                yield ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=text), delta=token)
+        return gen()
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        return CompletionResponse(text="".join(self.tokens("Learn data analysis with Python, SQL and statistics.")))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        def gen():
+            text = ""
+            for token in self.tokens("Learn data analysis with Python, SQL and statistics."):
+                text += token
+                yield CompletionResponse(text=text, delta=token)
+        return gen()
+
+
+def fake_web_search(query, max_results):
+    return [{"title": f"Course {i + 1} for {query}", "href": f"https://example.com/course/{i + 1}", "body": "A stub course."} for i in range(max_results)]
+
+
+def run_session(session_id, turns, latencies, errors):
+    session = SearchSession(RIASEC_RESULT, ranker=FacetRanker(engine="lexical"), web_search=fake_web_search)
+    memory = RollingSummaryMemory.from_budget(Settings.llm)
+    session.memory = memory
+    agent = ReActAgent.from_tools(build_tools(session), memory=memory, llm=Settings.llm, verbose=False)
+    for turn in range(turns):
+        prompt = SCRIPT[turn % len(SCRIPT)][0]
+        session.start_turn()
+        start_time = time.perf_counter()
+        try:
+            response_stream = agent.stream_chat(prompt)
+            for _ in response_stream.response_gen:
+                pass
+            latency = time.perf_counter() - start_time
+        except Exception as e:
+            errors.append(f"session {session_id}, turn {turn}: {e}")
+            continue
+        # The tools catch their own exceptions and hand the LLM an "Error ..." observation instead
+        failed = [f"{source.tool_name}: {source.content}" for source in response_stream.sources if str(source.content).startswith("Error")]
+        if failed:
+            errors.append(f"session {session_id}, turn {turn}: {'; '.join(failed)}")
+        else:
+            latencies.append(latency)
+
+
+def run_level(sessions, turns):
+    latencies, errors = [], []
+    tracemalloc.reset_peak()
+    start_time = time.perf_counter()
+    threads = [threading.Thread(target=run_session, args=(i, turns, latencies, errors)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    runtime = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    return {
+        "sessions": sessions,
+        "turns": len(latencies),
+        "errors": len(errors),
+        "p50": np.percentile(latencies, 50) if latencies else float('nan'),
+        "p95": np.percentile(latencies, 95) if latencies else float('nan'),
+        "p99": np.percentile(latencies, 99) if latencies else float('nan'),
+        "throughput": len(latencies) / runtime,
+        "peak_mb": peak / 2 ** 20,
+        # ru_maxrss is in kilobytes on Linux
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10,
+    }, errors
+
+
+def setup(args, cache_dir):
+    """Point the tools at the stand-in API and at cache files of their own."""
+    Settings.llm = FakeReActLLM(first_token_latency=args.llm_latency, token_latency=args.token_latency)
+    Settings.embed_model = MockEmbedding(embed_dim=1024)
+    # Before create_app, which may make its vacancies up from the job catalog
+    job_catalog.CATALOG_CACHE_FILE = os.path.join(cache_dir, 'job_catalog.npz')
+    vacancy_mirror.MIRROR_FILE = os.path.join(cache_dir, 'vacancies.db')
+    vacancy_detail_cache.DETAIL_CACHE_FILE = os.path.join(cache_dir, 'vacancy_details.json')
+    vacancy_liveness.LIVENESS_FILE = os.path.join(cache_dir, 'vacancy_liveness.json')
+    server, base_url = serve_in_background(create_app(latency=args.api_latency, jitter=args.api_latency / 2, error_rate=args.error_rate, seed=0))
+    petra_client.PETRA_API_URL = base_url
+    if args.mirror:
+        vacancy_mirror.sync(full=True)
+    print(f"Stand-in Petra API at {base_url}, vacancy details from {'the mirror' if args.mirror else 'the API'}")
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test of concurrent Search page sessions")
+    parser.add_argument('--sessions', default='1,2,4,8,16', help="comma separated numbers of concurrent sessions")
+    parser.add_argument('--turns', type=int, default=len(SCRIPT), help="user turns per session")
+    parser.add_argument('--llm-latency', type=float, default=0.5, help="seconds before the fake LLM's first token")
+    parser.add_argument('--token-latency', type=float, default=0.01, help="seconds between the fake LLM's tokens")
+    parser.add_argument('--api-latency', type=float, default=0.05, help="seconds added to every stand-in API response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of stand-in API requests answered with a 500")
+    parser.add_argument('--mirror', action='store_true', help="sync the vacancy mirror from the stand-in API first")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        server = setup(args, cache_dir)
+        tracemalloc.start()
+        results = []
+        for sessions in [int(n) for n in args.sessions.split(',')]:
+            result, errors = run_level(sessions, args.turns)
+            results.append(result)
+            for error in errors[:5]:
+                print(error)
+        tracemalloc.stop()
+        server.shutdown()
+
+    print(f"{'sessions':>8} {'turns':>6} {'errors':>6} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'turns/s':>8} {'peak MB':>8} {'RSS MB':>8}")
+    for r in results:
+        print(f"{r['sessions']:>8} {r['turns']:>6} {r['errors']:>6} {r['p50']:>8.3f} {r['p95']:>8.3f} {r['p99']:>8.3f} {r['throughput']:>8.2f} {r['peak_mb']:>8.1f} {r['max_rss_mb']:>8.1f}")
@@ -0,0 +1,186 @@
+import difflib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from agents import petra_client
+from agents import vacancy_mirror
+
+directory = './cache'
+if not os.path.exists(directory):
+    os.makedirs(directory)
+LOCATION_FILE = './cache/locations.json'
+# Provinces and cities rarely change, refresh the index monthly
+LOCATION_REFRESH_INTERVAL = int(os.getenv("LOCATION_REFRESH_INTERVAL", 2592000))
+FUZZY_CUTOFF = 0.8
+# Fuzzy matches remembered per process, misses are not remembered
+FUZZY_CACHE_SIZE = 1024
+
+# Common abbreviations and English names, mapped to the normalized official name
+PROVINCE_ALIASES = {
+    "jatim": "jawa timur", "east java": "jawa timur",
+    "jateng": "jawa tengah", "central java": "jawa tengah",
+    "jabar": "jawa barat", "west java": "jawa barat",
+    "jakarta": "dki jakarta", "dki": "dki jakarta",
+    "jogja": "di yogyakarta", "jogjakarta": "di yogyakarta", "yogya": "di yogyakarta", "yogyakarta": "di yogyakarta", "diy": "di yogyakarta",
+    "sumut": "sumatera utara", "north sumatra": "sumatera utara",
+    "sumbar": "sumatera barat", "west sumatra": "sumatera barat",
+    "sumsel": "sumatera selatan", "south sumatra": "sumatera selatan",
+    "kaltim": "kalimantan timur", "east kalimantan": "kalimantan timur",
+    "kalbar": "kalimantan barat", "west kalimantan": "kalimantan barat",
+    "kalsel": "kalimantan selatan", "south kalimantan": "kalimantan selatan",
+    "kalteng": "kalimantan tengah", "central kalimantan": "kalimantan tengah",
+    "kaltara": "kalimantan utara", "north kalimantan": "kalimantan utara",
+    "sulsel": "sulawesi selatan", "south sulawesi": "sulawesi selatan",
+    "sulut": "sulawesi utara", "north sulawesi": "sulawesi utara",
+    "sulteng": "sulawesi tengah", "central sulawesi": "sulawesi tengah",
+    "sultra": "sulawesi tenggara", "southeast sulawesi": "sulawesi tenggara",
+    "sulbar": "sulawesi barat", "west sulawesi": "sulawesi barat",
+    "ntt": "nusa tenggara timur", "ntb": "nusa tenggara barat",
+    "babel": "kepulauan bangka belitung", "bangka belitung": "kepulauan bangka belitung",
+    "kepri": "kepulauan riau", "riau islands": "kepulauan riau",
+}
+
+_index = None
+_lock = threading.Lock()
+# (table name, normalized name) -> matched location, least recently used first
+_fuzzy_matches = OrderedDict()
+
+
+def normalize(name, keep_prefix=False):
+    """Lowercase, drop punctuation and administrative prefixes like "Provinsi" or "Kota".
+
+    With `keep_prefix` the prefix stays, spelled out ("Kab." becomes "kabupaten"), since
+    "Kota Malang" and "Kabupaten Malang" are different cities.
+    """
+    name = re.sub(r"\s+", " ", re.sub(r"[^a-z0-9 ]", " ", str(name).lower())).strip()
+    if keep_prefix:
+        return re.sub(r"^kab ", "kabupaten ", name)
+    return re.sub(r"^(provinsi|prov|propinsi|kota|kabupaten|kab) ", "", name)
+
+
+def mirror_cities():
+    """Cities and their province from the vacancy mirror, empty until its first sync."""
+    cities = {}
+    if vacancy_mirror.is_populated():
+        connection = vacancy_mirror.connect()
+        try:
+            for row in connection.execute("SELECT DISTINCT id_mh_city, city, id_mh_province FROM vacancies WHERE city IS NOT NULL"):
+                cities[row['city']] = {'id': row['id_mh_city'], 'name': row['city'], 'id_mh_province': row['id_mh_province']}
+        finally:
+            connection.close()
+    return list(cities.values())
+
+
+def fetch_locations():
+    """Provinces come from /api/province, cities and their province from the vacancy mirror."""
+    r = petra_client.get('/api/province')
+    r.raise_for_status()
+    provinces = [{'id': d['id'], 'name': d['name']} for d in r.json()['provinces']]
+    return {'provinces': provinces, 'cities': mirror_cities(), 'mirror_version': vacancy_mirror.data_version(), 'built_at': time.time()}
+
+
+def save_locations(locations):
+    """Write the index to LOCATION_FILE, unless it has no cities yet because the mirror hasn't synced."""
+    if not locations['cities']:
+        print("Vacancy mirror has no cities yet, not caching the location index")
+        return
+    with open(LOCATION_FILE, 'w') as f:
+        json.dump(locations, f)
+
+
+def build_lookup(locations):
+    provinces = {normalize(province['name']): province for province in locations['provinces']}
+    for alias, name in PROVINCE_ALIASES.items():
+        if name in provinces:
+            provinces.setdefault(alias, provinces[name])
+    cities = {normalize(city['name'], keep_prefix=True): city for city in locations['cities']}
+    # The bare name ("malang") only finds a city when no other city shares it
+    by_bare_name = {}
+    for city in locations['cities']:
+        by_bare_name.setdefault(normalize(city['name']), []).append(city)
+    for name, matches in by_bare_name.items():
+        if len(matches) == 1:
+            cities.setdefault(name, matches[0])
+    provinces_by_id = {province['id']: province for province in locations['provinces']}
+    return {'locations': locations, 'provinces': provinces, 'cities': cities, 'provinces_by_id': provinces_by_id}
+
+
+def load_index():
+    """Load the index from LOCATION_FILE, refreshing it when it's older than LOCATION_REFRESH_INTERVAL.
+
+    The cities are rebuilt from the mirror whenever a sync changed it since the index was
+    built, so an index built before the first sync doesn't stay without cities.
+    """
+    global _index
+    mirror_version = vacancy_mirror.data_version()
+    with _lock:
+        if _index is not None and _index['locations'].get('mirror_version') == mirror_version:
+            return _index
+        locations = _index['locations'] if _index is not None else None
+        if locations is None and os.path.exists(LOCATION_FILE):
+            try:
+                with open(LOCATION_FILE, 'r') as f:
+                    locations = json.load(f)
+            except json.JSONDecodeError:
+                print("Location index is invalid JSON. Rebuilding index.")
+        if locations is None or time.time() - locations['built_at'] >= LOCATION_REFRESH_INTERVAL:
+            try:
+                locations = fetch_locations()
+                save_locations(locations)
+            except petra_client.RequestError + (ValueError, KeyError) as e:
+                # A stale index is better than none
+                print(f"Failed to refresh the location index: {e}")
+                if locations is None:
+                    return build_lookup({'provinces': [], 'cities': [], 'built_at': 0})
+        if locations.get('mirror_version') != mirror_version:
+            locations = dict(locations, cities=mirror_cities(), mirror_version=mirror_version)
+            save_locations(locations)
+        _index = build_lookup(locations)
+        _fuzzy_matches.clear()
+        return _index
+
+
+def lookup(table_name, name):
+    """Exact match on the normalized name, then a fuzzy match that is remembered for the next lookup."""
+    table = load_index()[table_name]
+    keys = list(dict.fromkeys((normalize(name, keep_prefix=True), normalize(name))))
+    for key in keys:
+        if key in table:
+            return table[key]
+    key = keys[0]
+    with _lock:
+        if (table_name, key) in _fuzzy_matches:
+            _fuzzy_matches.move_to_end((table_name, key))
+            return _fuzzy_matches[(table_name, key)]
+    matches = [match for key in keys for match in difflib.get_close_matches(key, list(table), n=1, cutoff=FUZZY_CUTOFF)]
+    if not matches:
+        return None
+    match = table[matches[0]]
+    with _lock:
+        _fuzzy_matches[(table_name, key)] = match
+        if len(_fuzzy_matches) > FUZZY_CACHE_SIZE:
+            _fuzzy_matches.popitem(last=False)
+    return match
+
+
+def find_province(name):
+    """Returns {'id', 'name'} of the province called `name` ("Jatim", "jawa timur", "Provinsi Jawa Timur"), or None."""
+    return lookup('provinces', name)
+
+
+def find_city(name):
+    """Returns {'id', 'name', 'id_mh_province'} of the city called `name`, or None.
+
+    "Malang" alone finds nothing while both "Kota Malang" and "Kabupaten Malang" exist.
+    """
+    return lookup('cities', name)
+
+
+def province_of_city(name):
+    city = find_city(name)
+    if city is None:
+        return None
+    return load_index()['provinces_by_id'].get(city['id_mh_province'])
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+import requests
+from llama_index.llms.ollama import Ollama
+from llama_index.embeddings.ollama import OllamaEmbedding
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434").rstrip("/")
+CHAT_MODEL = os.getenv("CHAT_MODEL", "llama3.1:8b-instruct-q4_0")
+EMBED_MODEL = "mxbai-embed-large:latest"
+# How long Ollama keeps a model loaded after a request, "-1" keeps it loaded until the server stops
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Seconds between keep-alive pings. Requests that don't pass keep_alive (like the embedding
+# client's) reset it to Ollama's 5 minute default, so ping more often than that.
+KEEPALIVE_INTERVAL = int(os.getenv("OLLAMA_KEEPALIVE_INTERVAL", 240))
+REQUEST_TIMEOUT = float(os.getenv("OLLAMA_REQUEST_TIMEOUT", 300))
+
+_llms = {}
+_embed_model = None
+_lock = threading.Lock()
+_keepalive_thread = None
+# model -> {"cold": seconds, "warm": seconds, "load": seconds}
+latency_stats = {}
+
+
+def get_llm(system_prompt=None, temperature=0, model=CHAT_MODEL):
+    """Return the process-wide Ollama LLM for these settings, built on first use."""
+    key = (model, system_prompt, temperature)
+    with _lock:
+        if key not in _llms:
+            _llms[key] = Ollama(model=model, base_url=OLLAMA_BASE_URL, system_prompt=system_prompt,
+                                temperature=temperature, keep_alive=OLLAMA_KEEP_ALIVE, request_timeout=REQUEST_TIMEOUT)
+        return _llms[key]
+
+
+def get_embed_model():
+    """Return the process-wide Ollama embedding model, built on first use."""
+    global _embed_model
+    with _lock:
+        if _embed_model is None:
+            _embed_model = OllamaEmbedding(base_url=OLLAMA_BASE_URL, model_name=EMBED_MODEL)
+        return _embed_model
+
+
+def first_token_latency(model):
+    """Seconds until Ollama streams the first token of a one-token completion, and seconds it spent loading the model."""
+    start_time = time.perf_counter()
+    first_token = None
+    load = 0.0
+    with requests.post(f"{OLLAMA_BASE_URL}/api/generate", json={
+        "model": model,
+        "prompt": "Hi",
+        "stream": True,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {"num_predict": 1},
+    }, stream=True, timeout=REQUEST_TIMEOUT) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if first_token is None:
+                first_token = time.perf_counter() - start_time
+            if chunk.get("done"):
+                load = chunk.get("load_duration", 0) / 1e9
+    return first_token, load
+
+
+def embed_latency(model):
+    """Seconds until Ollama returns one embedding."""
+    start_time = time.perf_counter()
+    r = requests.post(f"{OLLAMA_BASE_URL}/api/embed", json={
+        "model": model,
+        "input": "warmup",
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+    }, timeout=REQUEST_TIMEOUT)
+    r.raise_for_status()
+    return time.perf_counter() - start_time, r.json().get("load_duration", 0) / 1e9
+
+
+def warmup(chat_models=(CHAT_MODEL,), embed_models=(EMBED_MODEL,)):
+    """Load the models into Ollama and measure their cold and warm first-token latency.
+
+    The first request pays for loading the model if it wasn't resident, the second one
+    shows the latency users get once it is.
+    """
+    for model in list(chat_models) + list(embed_models):
+        measure = embed_latency if model in embed_models else first_token_latency
+        try:
+            cold, load = measure(model)
+            warm, _ = measure(model)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Warming up {model} failed: {e}")
+            continue
+        latency_stats[model] = {"cold": cold, "warm": warm, "load": load}
+    print_latency_stats()
+
+
+def keep_alive(chat_models=(CHAT_MODEL,), embed_models=(EMBED_MODEL,)):
+    """Ask Ollama to keep the models loaded for another OLLAMA_KEEP_ALIVE, without generating anything."""
+    for model in chat_models:
+        requests.post(f"{OLLAMA_BASE_URL}/api/generate", json={"model": model, "keep_alive": OLLAMA_KEEP_ALIVE}, timeout=REQUEST_TIMEOUT)
+    for model in embed_models:
+        requests.post(f"{OLLAMA_BASE_URL}/api/embed", json={"model": model, "input": "", "keep_alive": OLLAMA_KEEP_ALIVE}, timeout=REQUEST_TIMEOUT)
+
+
+def warmup_in_background(chat_models=(CHAT_MODEL,), embed_models=(EMBED_MODEL,), interval=KEEPALIVE_INTERVAL):
+    """Build the embedding client, warm the models up and keep them loaded from a daemon thread. Runs once per process."""
+    global _keepalive_thread
+    with _lock:
+        if _keepalive_thread is not None:
+            return
+        _keepalive_thread = threading.Thread(target=run_keepalive, args=(chat_models, embed_models, interval), daemon=True)
+    get_embed_model()
+    _keepalive_thread.start()
+
+
+def run_keepalive(chat_models, embed_models, interval):
+    warmup(chat_models, embed_models)
+    while True:
+        time.sleep(interval)
+        try:
+            keep_alive(chat_models, embed_models)
+        except requests.exceptions.RequestException as e:
+            print(f"Ollama keep-alive failed: {e}")
+
+
+def get_latency_stats():
+    """Returns {model: {"cold", "warm", "load"}} in seconds, measured by the warmup."""
+    return dict(latency_stats)
+
+
+def print_latency_stats():
+    for model, stats in get_latency_stats().items():
+        print(f"{model}: first token cold {stats['cold']:.3f}s (loading {stats['load']:.3f}s), warm {stats['warm']:.3f}s")
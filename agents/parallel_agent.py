@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from llama_index.core.async_utils import asyncio_run
+from llama_index.core.llms import ChatMessage, MessageRole
+from llama_index.core.tools import ToolOutput
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = get_script_run_ctx = None
+
+# "react" runs one tool per LLM step, "parallel" plans every independent tool call of a step at once
+SEARCH_AGENT_MODE = os.getenv("SEARCH_AGENT_MODE", "react")
+# Planning steps with tool calls before the agent has to answer
+MAX_PLAN_STEPS = int(os.getenv("MAX_PLAN_STEPS", 3))
+ANSWER_NOW = "Answer the user now, without any more tools."
+
+PLANNER_PROMPT = """
+## Tools
+You have access to the following tools:
+{tool_desc}
+
+## How to reply
+Reply in exactly one of these two ways.
+
+1. If you need tools, reply with ONLY a JSON object listing every tool call you can make right now:
+{{"calls": [{{"tool": "<tool name>", "input": {{<the tool's arguments>}}}}]}}
+Put ALL calls that don't need each other's results in the same list, they run at the same time.
+Recording a preference the user just stated must come before searching: put it in the same
+list as the search, it runs first so the search already uses it.
+For example "show me jobs and learning material" is one reply calling the job search and the
+educational content search together, with a topic you choose from the user's RIASEC result.
+Don't repeat a call whose result you already have.
+
+2. If you can answer, reply with the answer for the user in the user's language, without any JSON.
+"""
+
+
+class PlannedResponse:
+    """Streaming response of ParallelToolAgent, shaped like the ReActAgent's.
+
+    `response` and `sources` are complete once `response_gen` is exhausted.
+    """
+
+    def __init__(self, agent, message):
+        self.response = ""
+        self.sources = []
+        self.response_gen = agent.run(message, self)
+
+
+class ParallelToolAgent:
+    """Agent that plans all independent tool calls of a step in one LLM call and runs them concurrently.
+
+    Each step the LLM either answers or replies with a JSON list of tool calls. Calls to
+    `stateful_tools` run first, one after the other, the rest are awaited together with
+    asyncio.gather, each in a worker thread because the tools block on HTTP and Ollama, and
+    their results feed the next step. A request needing N independent tools costs two LLM
+    calls instead of N + 1.
+    """
+
+    def __init__(self, tools, llm, memory, system_prompt, max_steps=MAX_PLAN_STEPS, verbose=False, stateful_tools=()):
+        self.tools = {tool.metadata.name: tool for tool in tools}
+        # Tools that change the session, they run one at a time before the others of a step
+        self.stateful_tools = set(stateful_tools)
+        self.llm = llm
+        self.memory = memory
+        self.system_prompt = system_prompt + PLANNER_PROMPT.format(tool_desc=self.tool_descriptions())
+        self.max_steps = max_steps
+        self.verbose = verbose
+
+    def tool_descriptions(self):
+        return "\n".join(
+            f"> {tool.metadata.name}: {tool.metadata.description}\n  Arguments: {json.dumps(tool.metadata.get_parameters_dict().get('properties', {}))}"
+            for tool in self.tools.values()
+        )
+
+    def parse_plan(self, text):
+        """Returns the calls to known tools of a JSON plan, or None if `text` is no plan."""
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end < start:
+            return None
+        try:
+            plan = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+        calls = plan.get("calls") if isinstance(plan, dict) else None
+        if not isinstance(calls, list):
+            return None
+        return [call for call in calls if isinstance(call, dict) and call.get("tool") in self.tools]
+
+    def call_tool(self, call, ctx):
+        if ctx is not None:
+            # Lets the tools draw into the page, e.g. the vacancy cards
+            add_script_run_ctx(threading.current_thread(), ctx)
+        name = call["tool"]
+        arguments = call.get("input") or {}
+        try:
+            return self.tools[name].call(**arguments)
+        except Exception as e:
+            return ToolOutput(tool_name=name, content=f"Error: {e}", raw_input=arguments, raw_output=None)
+
+    async def call_tools(self, calls):
+        """Run the calls to stateful tools in order, then the rest concurrently. Outputs keep the order of `calls`."""
+        ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+        outputs = [None] * len(calls)
+        stateful = [i for i, call in enumerate(calls) if call["tool"] in self.stateful_tools]
+        for i in stateful:
+            outputs[i] = await asyncio.to_thread(self.call_tool, calls[i], ctx)
+        rest = [i for i in range(len(calls)) if i not in stateful]
+        for i, output in zip(rest, await asyncio.gather(*[asyncio.to_thread(self.call_tool, calls[i], ctx) for i in rest])):
+            outputs[i] = output
+        return outputs
+
+    def run(self, message, response):
+        messages = [ChatMessage(role=MessageRole.SYSTEM, content=self.system_prompt)] + self.memory.get(input=message) + [ChatMessage(role=MessageRole.USER, content=message)]
+        answering = False
+        for step in range(self.max_steps + 1):
+            if step == self.max_steps and not answering:
+                messages.append(ChatMessage(role=MessageRole.USER, content=ANSWER_NOW))
+                answering = True
+            stream = self.llm.stream_chat(messages)
+            text = ""
+            # A plan starts with "{" (or a ``` fence), anything else is the answer and is streamed as it comes
+            for chunk in stream:
+                text += chunk.delta or ""
+                if text.strip():
+                    break
+            if not answering and text.strip().startswith(("{", "`")):
+                for chunk in stream:
+                    text += chunk.delta or ""
+                calls = self.parse_plan(text)
+                if calls:
+                    start_time = time.perf_counter()
+                    outputs = asyncio_run(self.call_tools(calls))
+                    if self.verbose:
+                        print(f"Step {step + 1}: ran {[call['tool'] for call in calls]} concurrently in {time.perf_counter() - start_time:.4f} seconds")
+                    response.sources += outputs
+                    messages.append(ChatMessage(role=MessageRole.ASSISTANT, content=text))
+                    messages.append(ChatMessage(role=MessageRole.USER, content="Tool results:\n\n" + "\n\n".join(f"[{output.tool_name}]\n{output.content}" for output in outputs)))
+                    continue
+                # No call to a known tool (or no plan at all), ask for the answer instead of showing the JSON
+                if self.verbose:
+                    print(f"Step {step + 1}: no usable tool calls in {text!r}, asking for the answer")
+                messages.append(ChatMessage(role=MessageRole.ASSISTANT, content=text))
+                messages.append(ChatMessage(role=MessageRole.USER, content=ANSWER_NOW))
+                answering = True
+                continue
+            response.response = text
+            yield text
+            for chunk in stream:
+                response.response += chunk.delta or ""
+                yield chunk.delta or ""
+            break
+        self.memory.put(ChatMessage(role=MessageRole.USER, content=message))
+        self.memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=response.response))
+
+    def stream_chat(self, message):
+        return PlannedResponse(self, message)
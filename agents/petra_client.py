@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Point this at fetch/petra_stub_server.py to run without the real API
+PETRA_API_URL = os.getenv("PETRA_API_BASE_URL", "https://panel-alumni.petra.ac.id").rstrip("/")
+# Seconds to wait for the connection and for the response
+CONNECT_TIMEOUT = float(os.getenv("PETRA_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("PETRA_READ_TIMEOUT", 15))
+MAX_RETRIES = int(os.getenv("PETRA_MAX_RETRIES", 3))
+BACKOFF_FACTOR = float(os.getenv("PETRA_BACKOFF_FACTOR", 0.5))
+POOL_SIZE = int(os.getenv("PETRA_POOL_SIZE", 16))
+# HTTP/2 needs httpx with the h2 extra (pip install "httpx[http2]")
+USE_HTTP2 = os.getenv("PETRA_HTTP2", "False").lower() in ("1", "true", "yes")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+if httpx is not None:
+    RequestError = (requests.exceptions.RequestException, httpx.HTTPError)
+else:
+    RequestError = (requests.exceptions.RequestException,)
+
+_client = None
+_lock = threading.Lock()
+# endpoint -> durations in seconds of the latest calls
+_latencies = defaultdict(lambda: deque(maxlen=1000))
+
+
+def create_session():
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_client():
+    """Return the process-wide client, a keep-alive requests.Session or an HTTP/2 httpx.Client."""
+    global _client
+    with _lock:
+        if _client is None:
+            if USE_HTTP2 and httpx is not None:
+                _client = httpx.Client(
+                    http2=True,
+                    timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                    limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+                )
+            else:
+                if USE_HTTP2:
+                    print("PETRA_HTTP2 is set but httpx is not installed, using HTTP/1.1")
+                _client = create_session()
+        return _client
+
+
+def endpoint_name(path):
+    """Group paths by endpoint, e.g. every /api/vacancy/<slug> is reported as /api/vacancy/{slug}."""
+    parts = path.strip("/").split("/")
+    if len(parts) == 3 and parts[:2] == ["api", "vacancy"]:
+        return "/api/vacancy/{slug}"
+    return "/" + "/".join(parts)
+
+
+def get(path, params=None, timeout=None, headers=None):
+    """GET `path` from the Petra alumni API through the shared client.
+
+    `timeout` is (connect, read) seconds. Retries connection errors and RETRY_STATUSES with
+    exponential backoff, and records the latency of the call under its endpoint.
+    """
+    client = get_client()
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    url = PETRA_API_URL + path
+    start_time = time.perf_counter()
+    try:
+        if isinstance(client, requests.Session):
+            return client.get(url, params=params, timeout=timeout, headers=headers)
+        # httpx only retries failed connects, so retry here like urllib3's Retry does
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                r = client.get(url, params=params, headers=headers, timeout=httpx.Timeout(timeout[1], connect=timeout[0]))
+                if r.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    return r
+            except httpx.TransportError:
+                if attempt == MAX_RETRIES:
+                    raise
+            time.sleep(BACKOFF_FACTOR * (2 ** attempt))
+    finally:
+        _latencies[endpoint_name(path)].append(time.perf_counter() - start_time)
+
+
+def get_latency_stats():
+    """Returns {endpoint: {"calls", "avg", "p50", "p95", "max"}} in seconds over the latest calls."""
+    stats = {}
+    for endpoint, durations in list(_latencies.items()):
+        durations = sorted(durations)
+        if not durations:
+            continue
+        stats[endpoint] = {
+            "calls": len(durations),
+            "avg": sum(durations) / len(durations),
+            "p50": durations[len(durations) // 2],
+            "p95": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            "max": durations[-1],
+        }
+    return stats
+
+
+def print_latency_stats():
+    for endpoint, stats in get_latency_stats().items():
+        print(f"{endpoint}: {stats['calls']} calls, avg {stats['avg']:.3f}s, p50 {stats['p50']:.3f}s, p95 {stats['p95']:.3f}s, max {stats['max']:.3f}s")
@@ -3,13 +3,44 @@ from swarm import Swarm, Agent
 from dotenv import load_dotenv
 import pandas as pd
 import csv
+import json
+import os
+import re
+import threading
 import time
 import pandas as pd
-import requests
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from agents.job_catalog import JOBS_FILE, load_job_catalog
+from agents.job_embeddings import shortlist_positions
+from agents.lexical_ranker import rate_positions_lexical
+from agents import rating_cache
+from agents import vacancy_liveness
 
 load_dotenv()
 MODEL = "llama3.2:latest"
+# "single" asks the model once per position, "batch" sends BATCH_SIZE positions per request
+RATING_MODE = os.getenv("RATING_MODE", "single")
+BATCH_SIZE = int(os.getenv("RATING_BATCH_SIZE", 20))
+# Only the SHORTLIST_TOP_K positions closest to the keyword are sent to the LLM, 0 rates everything
+SHORTLIST_TOP_K = int(os.getenv("SHORTLIST_TOP_K", 40))
+# "llm" rates with the rating agent, "lexical" with the local BM25 ranker
+RANKING_ENGINE = os.getenv("RANKING_ENGINE", "llm")
+# Seconds the LLM may spend on a ranking before the lexical ranking is used instead, 0 waits forever
+LLM_TIME_BUDGET = float(os.getenv("LLM_TIME_BUDGET", 60))
+# iter_relevant_jobs yields a job as soon as it is rated at least this high
+RATING_THRESHOLD = int(os.getenv("RATING_THRESHOLD", 70))
+# Maximum number of requests in flight toward Ollama, 1 keeps the sequential path
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", 1))
 client = Swarm()
+# Caps the rating requests in flight for the whole process, across rankings, sessions
+# and ratings still finishing after their ranking's time budget ran out
+ollama_slots = threading.BoundedSemaphore(max(1, OLLAMA_CONCURRENCY))
+
+# Filled after every ranking so callers can see how expensive it was
+last_ranking_stats = {}
+# LLM ratings and shortlist embeddings run here so a ranking can stop waiting once its time
+# budget is spent. Ratings that finish late still land in the rating cache.
+llm_executor = ThreadPoolExecutor(max_workers=4)
 
 rating_agent = Agent(
     name="Rating Agent",
@@ -29,16 +60,98 @@ rating_agent = Agent(
     model=MODEL,
 )
 
+batch_rating_agent = Agent(
+    name="Batch Rating Agent",
+    instructions="""
+        Instructions:
+        Your task is to evaluate the compatibility between a keyword and each job in a numbered list of jobs.
+        Every compatibility score must be an integer between 0 and 100, where:
+        
+        - 100: The keyword is highly relevant to the job, meaning it is essential or frequently used for the job.
+        - 0: The keyword has no relevance to the job and is not typically associated with the job.
+        
+        Requirements:
+        Give exactly one score for every job, in the same order as the numbered list.
+        Output only a JSON array of integers (e.g., [85, 10, 40]). DO NOT include any additional text, symbols, or characters.
+    """,
+    functions=[],
+    model=MODEL,
+)
+
+def parse_rating(text):
+    match = re.search(r"\d+", str(text))
+    if match is None:
+        return 0
+    return max(0, min(100, int(match.group())))
+
+def parse_batch_ratings(text, expected):
+    """Reads the JSON array returned by the batch agent, padding or trimming it to `expected` scores."""
+    match = re.search(r"\[.*?\]", str(text), re.DOTALL)
+    try:
+        scores = json.loads(match.group()) if match is not None else []
+    except json.JSONDecodeError:
+        scores = re.findall(r"\d+", match.group())
+    ratings = [parse_rating(score) for score in scores][:expected]
+    if len(ratings) < expected:
+        print(f"Batch rating returned {len(ratings)} scores for {expected} jobs, missing ones are rated 0")
+        ratings += [0] * (expected - len(ratings))
+    return ratings
+
 def get_compability_rating(keyword, job):
     prompt = f"From the scale 0 - 100, what is the compatibility for {keyword} to have a job as a {job}"
     print(prompt)
-    compatibility_response = client.run(
-        agent=rating_agent,
-        messages=[{"role": "user", "content": f"{prompt}"}]
-    )
+    with ollama_slots:
+        compatibility_response = client.run(
+            agent=rating_agent,
+            messages=[{"role": "user", "content": f"{prompt}"}]
+        )
     rating = compatibility_response.messages[-1]['content']
     return rating
 
+def get_batch_compability_ratings(keyword, jobs):
+    job_list = "\n".join(f"{i + 1}. {job}" for i, job in enumerate(jobs))
+    prompt = f"From the scale 0 - 100, what is the compatibility for {keyword} to have each of these {len(jobs)} jobs:\n{job_list}"
+    print(prompt)
+    with ollama_slots:
+        compatibility_response = client.run(
+            agent=batch_rating_agent,
+            messages=[{"role": "user", "content": f"{prompt}"}]
+        )
+    return parse_batch_ratings(compatibility_response.messages[-1]['content'], len(jobs))
+
+def map_with_concurrency(fn, items, concurrency):
+    """Like map(), but runs up to `concurrency` calls at once. Results keep the order of `items`."""
+    if concurrency <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        return list(executor.map(fn, items))
+
+def rate_uncached_positions(keyword, positions, mode=RATING_MODE, batch_size=BATCH_SIZE, concurrency=OLLAMA_CONCURRENCY):
+    """Returns the rating of every position and the number of LLM calls it took."""
+    if mode == "batch":
+        batches = [positions[start:start + batch_size] for start in range(0, len(positions), batch_size)]
+        batch_ratings = map_with_concurrency(lambda batch: get_batch_compability_ratings(keyword, batch), batches, concurrency)
+        return [rating for ratings in batch_ratings for rating in ratings], len(batches)
+    if mode == "single":
+        ratings = map_with_concurrency(lambda position: parse_rating(get_compability_rating(keyword, position)), positions, concurrency)
+        return ratings, len(positions)
+    raise ValueError(f"Unknown rating mode: {mode}")
+
+def rate_positions(keyword, positions, mode=RATING_MODE, batch_size=BATCH_SIZE, concurrency=OLLAMA_CONCURRENCY):
+    """Like rate_uncached_positions, but only asks the LLM about pairs missing from the rating cache."""
+    if mode not in ("single", "batch"):
+        raise ValueError(f"Unknown rating mode: {mode}")
+    ratings = [rating_cache.get_cached_rating(keyword, position, MODEL) for position in positions]
+    missing = [i for i, rating in enumerate(ratings) if rating is None]
+    if not missing:
+        return ratings, 0
+    new_ratings, llm_calls = rate_uncached_positions(keyword, [positions[i] for i in missing], mode, batch_size, concurrency)
+    for i, rating in zip(missing, new_ratings):
+        ratings[i] = rating
+        rating_cache.set_cached_rating(keyword, positions[i], MODEL, rating)
+    rating_cache.save_cache()
+    return ratings, llm_calls
+
 def load_csv_slugs():
     with open('pages/slug.csv', newline='') as csvfile:
         spamreader = csv.reader(csvfile)
@@ -48,29 +161,183 @@ def load_csv_slugs():
         return slugs
 
 def load_xlsx_jobs():
-    file_path = 'pages/jobs.xlsx' 
-    data = pd.read_excel(file_path)
+    data = load_job_catalog(JOBS_FILE)
     data["rating"] = 0
     return data     
     
-def get_relevant_jobs(keyword):
+def shortlist_within_budget(keyword, positions, top_k, candidates, deadline):
+    """The embedding shortlist of `candidates`, or None if it fails or is not back before `deadline`.
+
+    The query embedding (and on first use the catalog's) comes from Ollama, so it is bound
+    by the ranking's time budget like the ratings are.
+    """
+    future = llm_executor.submit(shortlist_positions, keyword, positions, JOBS_FILE, top_k, candidates=candidates)
+    try:
+        return future.result(timeout=None if deadline is None else max(0, deadline - time.time()))
+    except TimeoutError:
+        print("Embedding the shortlist exceeded the time budget")
+    except Exception as e:
+        print(f"Embedding the shortlist failed: {e}")
+    return None
+
+def select_candidates(keyword, jobs, top_k, ordered=False, deadline=None):
+    """Returns the positions of the catalog, the indices of the live vacancies and the indices worth rating.
+
+    With `ordered` the candidates are sorted by embedding similarity, best first. The
+    shortlist is None when embedding failed or did not finish before `deadline`.
+    """
+    positions = [str(position) for position in jobs["Position"]]
+    slugs = [link[35:] for link in jobs["Link"]]
+    vacancy_liveness.refresh_in_background(slugs)
+    # Dead and expired vacancies are dropped before any LLM work
+    live = [i for i, slug in enumerate(slugs) if vacancy_liveness.is_live(slug)]
+    print(f"{len(live)} of {len(slugs)} vacancies are live")
+    shortlist = live
+    if (top_k and top_k < len(live)) or ordered:
+        shortlist = shortlist_within_budget(keyword, positions, top_k or len(live), live, deadline)
+        if shortlist is not None:
+            print(f"Shortlisted {len(shortlist)} of {len(live)} jobs")
+    return positions, live, shortlist
+
+def record_ranking_stats(mode, jobs, rated, llm_calls, hits, misses, start_time):
+    runtime = time.time() - start_time
+    last_ranking_stats.clear()
+    last_ranking_stats.update({
+        "mode": mode,
+        "jobs": jobs,
+        "rated": rated,
+        "llm_calls": llm_calls,
+        "cache_hits": rating_cache.stats["hits"] - hits,
+        "cache_misses": rating_cache.stats["misses"] - misses,
+        "seconds": runtime,
+    })
+    print(f"Ranking ({mode}): {llm_calls} LLM calls, {last_ranking_stats['cache_hits']} cache hits, {last_ranking_stats['cache_misses']} cache misses, {runtime:.4f} seconds")
+
+def get_descriptions(jobs):
+    if "Description" in jobs.columns:
+        return [str(description) for description in jobs["Description"]]
+    return None
+
+def rate_positions_within_budget(keyword, positions, mode, concurrency, deadline):
+    """Rate with the LLM, returning None if the ratings are not back before `deadline` (None waits forever)."""
+    future = llm_executor.submit(rate_positions, keyword, positions, mode, concurrency=concurrency)
+    try:
+        return future.result(timeout=None if deadline is None else max(0, deadline - time.time()))
+    except TimeoutError:
+        return None
+
+def get_relevant_jobs(keyword, mode=RATING_MODE, top_k=SHORTLIST_TOP_K, ollama_concurrency=OLLAMA_CONCURRENCY, engine=RANKING_ENGINE, time_budget=LLM_TIME_BUDGET):
+    start_time = time.time()
+    hits, misses = rating_cache.stats["hits"], rating_cache.stats["misses"]
     jobs = load_xlsx_jobs()
+    if engine == "lexical":
+        return get_lexical_relevant_jobs(keyword, jobs, start_time)
+    if engine != "llm":
+        raise ValueError(f"Unknown ranking engine: {engine}")
+    deadline = start_time + time_budget if time_budget else None
+    # Positions outside the shortlist keep their rating of 0
+    positions, live, shortlist = select_candidates(keyword, jobs, top_k, deadline=deadline)
+    if shortlist is None:
+        print("No embedding shortlist, using the lexical ranking")
+        return get_lexical_relevant_jobs(keyword, jobs, start_time)
+    rated = rate_positions_within_budget(keyword, [positions[i] for i in shortlist], mode, ollama_concurrency, deadline)
+    if rated is None:
+        print(f"LLM ranking exceeded its {time_budget} second budget, using the lexical ranking")
+        return get_lexical_relevant_jobs(keyword, jobs, start_time)
+    ratings, llm_calls = rated
     
-    for index, row in jobs.iterrows():
-        job_position = str(jobs.loc[index, "Position"])
-        rating = get_compability_rating(keyword, job_position)
-        slug = jobs.loc[index, "Link"][35:]
-        api_link = f'https://panel-alumni.petra.ac.id/api/vacancy/{slug}'
-        r = requests.get(api_link)
-        if (r.status_code != 200):
-            rating = 0
+    for index, rating in zip(jobs.index[shortlist], ratings):
         print(rating)
         jobs.loc[index, "rating"] = int(rating)
+    jobs = jobs.iloc[live]
     
     jobs_sorted = jobs.sort_values(by="rating", ascending=False)
     print(jobs_sorted.head())
+
+    record_ranking_stats(mode, len(jobs), len(shortlist), llm_calls, hits, misses, start_time)
+    return jobs_sorted
+
+def get_lexical_relevant_jobs(keyword, jobs, start_time):
+    positions = [str(position) for position in jobs["Position"]]
+    jobs["rating"] = rate_positions_lexical(keyword, positions, get_descriptions(jobs))
+    jobs = jobs[[vacancy_liveness.is_live(link[35:]) for link in jobs["Link"]]]
+    jobs_sorted = jobs.sort_values(by="rating", ascending=False, kind="stable")
+    print(jobs_sorted.head())
+    record_ranking_stats("lexical", len(jobs), len(jobs), 0, rating_cache.stats["hits"], rating_cache.stats["misses"], start_time)
     return jobs_sorted
 
+def iter_relevant_jobs(keyword, threshold=RATING_THRESHOLD, enough=None, mode=RATING_MODE, top_k=SHORTLIST_TOP_K, ollama_concurrency=OLLAMA_CONCURRENCY, engine=RANKING_ENGINE, time_budget=LLM_TIME_BUDGET):
+    """Yields catalog rows (with their rating) as soon as they are rated at least `threshold`.
+
+    Candidates are rated in embedding similarity order, one batch (or one round of
+    concurrent calls) at a time, and the generator stops once `enough` rows were yielded.
+    If the candidates run out first, the remaining rows follow from best to worst rating,
+    so a consumer always gets the same top results as get_relevant_jobs. Once the LLM has
+    used up `time_budget`, the jobs not yielded yet follow in lexical ranking order.
+    """
+    start_time = time.time()
+    if engine == "lexical":
+        yield from iter_lexical_relevant_jobs(keyword, load_xlsx_jobs(), start_time, enough)
+        return
+    if engine != "llm":
+        raise ValueError(f"Unknown ranking engine: {engine}")
+    hits, misses = rating_cache.stats["hits"], rating_cache.stats["misses"]
+    jobs = load_xlsx_jobs()
+    deadline = start_time + time_budget if time_budget else None
+    positions, live, shortlist = select_candidates(keyword, jobs, top_k, ordered=True, deadline=deadline)
+    if shortlist is None:
+        print("No embedding shortlist, using the lexical ranking")
+        yield from iter_lexical_relevant_jobs(keyword, jobs, start_time, enough)
+        return
+    chunk_size = BATCH_SIZE if mode == "batch" else max(1, ollama_concurrency)
+    below_threshold = []
+    yielded = []
+    llm_calls = 0
+    rated = 0
+    over_budget = False
+    try:
+        for start in range(0, len(shortlist), chunk_size):
+            chunk = shortlist[start:start + chunk_size]
+            chunk_rated = rate_positions_within_budget(keyword, [positions[i] for i in chunk], mode, ollama_concurrency, deadline)
+            if chunk_rated is None:
+                print(f"LLM ranking exceeded its {time_budget} second budget, continuing with the lexical ranking")
+                over_budget = True
+                seen = set(yielded)
+                remaining = jobs.iloc[[i for i in live if i not in seen]]
+                yield from iter_lexical_relevant_jobs(keyword, remaining, start_time, None if enough is None else enough - len(yielded))
+                return
+            ratings, calls = chunk_rated
+            llm_calls += calls
+            rated += len(chunk)
+            for i, rating in zip(chunk, ratings):
+                job = jobs.iloc[i].copy()
+                job["rating"] = int(rating)
+                if job["rating"] < threshold:
+                    below_threshold.append((i, job))
+                    continue
+                yield job
+                yielded.append(i)
+                if enough is not None and len(yielded) >= enough:
+                    return
+        # Live jobs outside the shortlist were never rated and come last with a rating of 0
+        shortlisted = set(shortlist)
+        unrated = [(i, jobs.iloc[i]) for i in live if i not in shortlisted]
+        for i, job in sorted(below_threshold, key=lambda item: item[1]["rating"], reverse=True) + unrated:
+            yield job
+            yielded.append(i)
+            if enough is not None and len(yielded) >= enough:
+                return
+    finally:
+        if not over_budget:
+            record_ranking_stats(mode, len(live), rated, llm_calls, hits, misses, start_time)
+
+def iter_lexical_relevant_jobs(keyword, jobs, start_time, enough=None):
+    jobs_sorted = get_lexical_relevant_jobs(keyword, jobs, start_time)
+    if enough is not None:
+        jobs_sorted = jobs_sorted.head(enough)
+    for _, job in jobs_sorted.iterrows():
+        yield job
+
 
 # Comment mulai sini kalo mau diimport
 
@@ -92,4 +359,3 @@ def get_relevant_jobs(keyword):
 #     end_time = time.time()
 #     runtime = end_time - start_time
 #     print(f"Runtime: {runtime:.4f} seconds\n")
-        
\ No newline at end of file
@@ -0,0 +1,77 @@
+import json
+import os
+import re
+import threading
+import time
+
+directory = './cache'
+if not os.path.exists(directory):
+    os.makedirs(directory)
+RATING_CACHE_FILE = './cache/rating_cache.json'
+RATING_CACHE_EXPIRATION = int(os.getenv("RATING_CACHE_EXPIRATION", 2592000))
+RATING_CACHE_MAX_ENTRIES = int(os.getenv("RATING_CACHE_MAX_ENTRIES", 50000))
+
+_entries = None
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+def normalize_keyword(keyword):
+    """Lowercase, trim and de-duplicate the comma separated terms of a keyword string."""
+    terms = []
+    for term in str(keyword).split(","):
+        term = re.sub(r"\s+", " ", term).strip().lower()
+        if term and term not in terms:
+            terms.append(term)
+    return ", ".join(terms)
+
+def make_key(keyword, position, model):
+    return json.dumps([normalize_keyword(keyword), re.sub(r"\s+", " ", str(position)).strip().lower(), model])
+
+def load_cache():
+    """Load the rating cache file once per process."""
+    global _entries
+    if _entries is None:
+        _entries = {}
+        if os.path.exists(RATING_CACHE_FILE):
+            try:
+                with open(RATING_CACHE_FILE, 'r') as f:
+                    _entries = json.load(f)
+            except json.JSONDecodeError:
+                print("Rating cache file is invalid JSON. Resetting cache.")
+    return _entries
+
+def save_cache():
+    """Evict expired and least recently used entries, then write the cache to disk."""
+    with _lock:
+        entries = load_cache()
+        now = time.time()
+        for key in [key for key, entry in entries.items() if now - entry['timestamp'] >= RATING_CACHE_EXPIRATION]:
+            del entries[key]
+        if len(entries) > RATING_CACHE_MAX_ENTRIES:
+            by_last_used = sorted(entries, key=lambda key: entries[key]['last_used'])
+            for key in by_last_used[:len(entries) - RATING_CACHE_MAX_ENTRIES]:
+                del entries[key]
+        temp_file = RATING_CACHE_FILE + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(entries, f)
+        os.replace(temp_file, RATING_CACHE_FILE)
+
+def get_cached_rating(keyword, position, model):
+    """Return the cached rating or None, counting the lookup as a hit or a miss."""
+    with _lock:
+        entry = load_cache().get(make_key(keyword, position, model))
+        if entry is None or time.time() - entry['timestamp'] >= RATING_CACHE_EXPIRATION:
+            stats["misses"] += 1
+            return None
+        stats["hits"] += 1
+        entry['last_used'] = time.time()
+        return entry['rating']
+
+def set_cached_rating(keyword, position, model, rating):
+    with _lock:
+        now = time.time()
+        load_cache()[make_key(keyword, position, model)] = {
+            'rating': rating,
+            'timestamp': now,
+            'last_used': now,
+        }
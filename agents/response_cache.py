@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import numpy as np
+from agents import vacancy_liveness
+from agents import vacancy_mirror
+from agents.job_catalog import JOBS_FILE, file_signature
+from agents.model_provider import EMBED_MODEL, get_embed_model
+
+directory = './cache'
+if not os.path.exists(directory):
+    os.makedirs(directory)
+RESPONSE_CACHE_FILE = './cache/response_cache.json'
+RESPONSE_CACHE_EXPIRATION = int(os.getenv("RESPONSE_CACHE_EXPIRATION", 86400))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 500))
+# Cosine similarity a stored question needs to count as the same question
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", 0.95))
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() in ("1", "true", "yes")
+
+_entries = None
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0, "invalidated": 0}
+
+
+def context_key(profile, context=""):
+    """Answers are only shared between chats with the same profile and the same previous answer."""
+    return hashlib.sha1(json.dumps([profile, context, EMBED_MODEL]).encode()).hexdigest()
+
+
+def embed(query, profile):
+    vector = np.array(get_embed_model().get_query_embedding(f"RIASEC profile: {profile}\nQuestion: {query}"), dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def data_version():
+    """Changes whenever the data tool answers are built on changes.
+
+    That is the vacancy mirror, the job catalog the jobs are ranked from (by size and
+    mtime) and the set of vacancies the liveness index hides.
+    """
+    versions = [vacancy_mirror.data_version()]
+    if os.path.exists(JOBS_FILE):
+        signature = file_signature(JOBS_FILE)
+        versions.append(f"{signature['size']}:{signature['mtime']}")
+    else:
+        versions.append("missing")
+    versions.append(vacancy_liveness.version())
+    return "|".join(versions)
+
+
+def load_cache():
+    """Load the response cache file once per process."""
+    global _entries
+    if _entries is None:
+        _entries = []
+        if os.path.exists(RESPONSE_CACHE_FILE):
+            try:
+                with open(RESPONSE_CACHE_FILE, 'r') as f:
+                    _entries = json.load(f)
+            except json.JSONDecodeError:
+                print("Response cache file is invalid JSON. Resetting cache.")
+            for entry in _entries:
+                entry['embedding'] = np.array(entry['embedding'], dtype=np.float32)
+    return _entries
+
+
+def save_cache():
+    """Drop expired entries and the oldest ones beyond RESPONSE_CACHE_MAX_ENTRIES, then write the cache to disk."""
+    with _lock:
+        entries = load_cache()
+        now = time.time()
+        entries[:] = [entry for entry in entries if now - entry['timestamp'] < RESPONSE_CACHE_EXPIRATION][-RESPONSE_CACHE_MAX_ENTRIES:]
+        temp_file = RESPONSE_CACHE_FILE + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump([dict(entry, embedding=entry['embedding'].tolist()) for entry in entries], f)
+        os.replace(temp_file, RESPONSE_CACHE_FILE)
+
+
+def lookup(query, profile, context=""):
+    """Return the stored answer to the most similar earlier question, or None.
+
+    Only questions asked with the same profile and context, within RESPONSE_CACHE_EXPIRATION
+    and above RESPONSE_CACHE_THRESHOLD count. Answers that used tools are dropped once the
+    vacancy mirror, the job catalog or the liveness index change. Returns (answer, embedding) so a miss can be stored without
+    embedding the question again.
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return None, None
+    embedding = embed(query, profile)
+    key = context_key(profile, context)
+    version = data_version()
+    now = time.time()
+    with _lock:
+        entries = load_cache()
+        stale = [entry for entry in entries if entry['tool_dependent'] and entry['data_version'] != version]
+        if stale:
+            stats["invalidated"] += len(stale)
+            entries[:] = [entry for entry in entries if not (entry['tool_dependent'] and entry['data_version'] != version)]
+        candidates = [entry for entry in entries if entry['key'] == key and now - entry['timestamp'] < RESPONSE_CACHE_EXPIRATION]
+        if candidates:
+            similarities = np.stack([entry['embedding'] for entry in candidates]) @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= RESPONSE_CACHE_THRESHOLD:
+                stats["hits"] += 1
+                print(f"Response cache hit ({similarities[best]:.3f}): '{query}' ~ '{candidates[best]['query']}'")
+                return candidates[best]['response'], embedding
+        stats["misses"] += 1
+        return None, embedding
+
+
+def store(query, profile, response, context="", tool_dependent=False, embedding=None):
+    """Store an answer. Tool-dependent answers remember the data_version() they were built on."""
+    if not RESPONSE_CACHE_ENABLED:
+        return
+    if embedding is None:
+        embedding = embed(query, profile)
+    with _lock:
+        load_cache().append({
+            'key': context_key(profile, context),
+            'query': query,
+            'embedding': embedding,
+            'response': response,
+            'tool_dependent': tool_dependent,
+            'data_version': data_version() if tool_dependent else None,
+            'timestamp': time.time(),
+        })
+    save_cache()
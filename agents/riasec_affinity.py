@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import threading
+import numpy as np
+from swarm import Agent
+from agents.job_catalog import JOBS_FILE, load_job_catalog
+from agents.rating_agent import MODEL, OLLAMA_CONCURRENCY, client, map_with_concurrency
+
+RIASEC_TYPES = ["Realistic", "Investigative", "Artistic", "Social", "Enterprising", "Conventional"]
+
+directory = './cache'
+if not os.path.exists(directory):
+    os.makedirs(directory)
+AFFINITY_FILE = './cache/riasec_affinity.npz'
+
+_affinity = None
+_lock = threading.Lock()
+
+affinity_agent = Agent(
+    name="RIASEC Affinity Agent",
+    instructions=f"""
+        Instructions:
+        Your task is to classify a job position into the six Holland RIASEC personality types.
+        Rate how well each type fits the job with an integer between 0 and 100, where:
+        
+        - 100: People of this type are a perfect fit for the job.
+        - 0: The job has nothing to do with this type.
+        
+        Requirements:
+        Output only a JSON object with exactly these keys: {", ".join(RIASEC_TYPES)} (e.g., {{"Realistic": 10, "Investigative": 80, "Artistic": 5, "Social": 30, "Enterprising": 40, "Conventional": 60}}).
+        DO NOT include any additional text, symbols, or characters.
+    """,
+    functions=[],
+    model=MODEL,
+)
+
+def parse_affinity(text):
+    """Read the six scores from the agent's answer, missing types get 0."""
+    match = re.search(r"\{.*?\}", str(text), re.DOTALL)
+    scores = {}
+    if match is not None:
+        try:
+            scores = {str(key).strip().lower(): value for key, value in json.loads(match.group()).items()}
+        except (json.JSONDecodeError, AttributeError):
+            scores = {}
+    affinity = []
+    for riasec_type in RIASEC_TYPES:
+        try:
+            affinity.append(max(0, min(100, int(float(scores.get(riasec_type.lower(), 0))))))
+        except (TypeError, ValueError):
+            affinity.append(0)
+    return affinity
+
+def classify_position(position):
+    prompt = f"Classify the job position '{position}' into the six RIASEC types."
+    print(prompt)
+    response = client.run(
+        agent=affinity_agent,
+        messages=[{"role": "user", "content": f"{prompt}"}]
+    )
+    return parse_affinity(response.messages[-1]['content'])
+
+def load_affinity():
+    """Returns {position: affinity vector} from AFFINITY_FILE, empty if it was never built."""
+    global _affinity
+    with _lock:
+        if _affinity is None:
+            _affinity = {}
+            if os.path.exists(AFFINITY_FILE):
+                with np.load(AFFINITY_FILE) as saved:
+                    _affinity = dict(zip(saved['positions'].tolist(), saved['matrix']))
+        return _affinity
+
+def build_affinity_matrix(file_path=JOBS_FILE, concurrency=OLLAMA_CONCURRENCY, rebuild=False):
+    """Classify every position of the catalog that has no affinity vector yet and persist the matrix."""
+    global _affinity
+    positions = list(dict.fromkeys(str(position) for position in load_job_catalog(file_path)["Position"]))
+    affinity = {} if rebuild else dict(load_affinity())
+    missing = [position for position in positions if position not in affinity]
+    print(f"Classifying {len(missing)} of {len(positions)} positions")
+    for position, vector in zip(missing, map_with_concurrency(classify_position, missing, concurrency)):
+        affinity[position] = np.array(vector, dtype=np.float32)
+    # Positions that left the catalog are dropped
+    matrix = np.array([affinity[position] for position in positions], dtype=np.float32).reshape(-1, len(RIASEC_TYPES))
+    np.savez(AFFINITY_FILE, positions=np.array(positions), types=np.array(RIASEC_TYPES), matrix=matrix)
+    with _lock:
+        _affinity = dict(zip(positions, matrix))
+    return matrix
+
+def get_affinity_matrix(positions):
+    """Returns the affinity matrix rows for `positions`, or None if any of them was never classified."""
+    affinity = load_affinity()
+    if not positions or any(str(position) not in affinity for position in positions):
+        return None
+    return np.array([affinity[str(position)] for position in positions], dtype=np.float32)
+
+def rate_positions_by_riasec(riasec_scores, positions):
+    """Rate positions 0 - 100 as the dot product of their affinity vectors with the user's normalized RIASEC scores.
+
+    `riasec_scores` maps each type to its total score, as computed by the RIASEC test page.
+    Returns None if the affinity matrix does not cover every position.
+    """
+    matrix = get_affinity_matrix(positions)
+    if matrix is None:
+        return None
+    weights = np.array([float(riasec_scores.get(riasec_type, 0)) for riasec_type in RIASEC_TYPES], dtype=np.float32)
+    if weights.sum() <= 0:
+        return [0] * len(positions)
+    return np.rint(matrix @ (weights / weights.sum())).astype(int).tolist()
+
+def rank_by_riasec(riasec_scores, jobs):
+    """Return `jobs` sorted by their RIASEC affinity rating, or None if the affinity matrix does not cover them."""
+    ratings = rate_positions_by_riasec(riasec_scores, [str(position) for position in jobs["Position"]])
+    if ratings is None:
+        return None
+    jobs = jobs.copy()
+    jobs["rating"] = ratings
+    return jobs.sort_values(by="rating", ascending=False, kind="stable")
+
+
+if __name__ == "__main__":
+    # python -m agents.riasec_affinity
+    build_affinity_matrix()
+    print(f"Saved RIASEC affinity matrix to {AFFINITY_FILE}")
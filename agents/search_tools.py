@@ -0,0 +1,201 @@
+from llama_index.core import VectorStoreIndex, SimpleDirectoryReader
+from llama_index.core.tools import FunctionTool
+from duckduckgo_search import DDGS
+from datetime import datetime
+from agents import petra_client
+from agents.facet_ranker import FacetRanker
+from agents.html_text import html_to_text
+from agents.vacancy_details import iter_vacancies, fetch_vacancy
+from agents.vacancy_format import SEARCH_OUTPUT_MODE, count_tokens, format_vacancy, search_instructions, vacancy_card
+
+
+def duckduckgo_search(query, max_results):
+    with DDGS() as ddg:
+        return ddg.text(query, max_results=max_results)
+
+
+class SearchSession:
+    """State of one Search page conversation, shared by its five tools.
+
+    Holds the user's RIASEC result with the recorded preferences, the facet ratings of the
+    session and the chat container vacancy cards are streamed into during a turn.
+    """
+
+    def __init__(self, riasec_result_data, memory=None, ranker=None, web_search=duckduckgo_search):
+        self.riasec_result_data = riasec_result_data.copy()
+        riasec_result_key_values = [{row['Type']: row['Total Score']} for index, row in self.riasec_result_data.iterrows()]
+        self.top_3 = sorted(riasec_result_key_values, key=lambda x: list(x.values())[0], reverse=True)[:3]
+        self.memory = memory
+        self.ranker = ranker or FacetRanker()
+        self.web_search = web_search
+        # Chat container search_job_vacancy renders vacancy cards into during a turn, None when not streaming
+        self.vacancy_cards = None
+        self.shown_vacancy_cards = []
+
+    def profile(self):
+        """The top 3 RIASEC types and the recorded preferences, everything the tools' answers depend on besides the question."""
+        profile = ", ".join(list(type_score.keys())[0] for type_score in self.top_3)
+        if 'preference' in self.riasec_result_data.columns and not self.riasec_result_data['preference'].empty:
+            profile += " | " + ", ".join(sorted(set(self.riasec_result_data['preference'].iloc[0].split(", ")) - {""}))
+        return profile
+
+    def add_preference(self, preference):
+        if 'preference' not in self.riasec_result_data.columns:
+            self.riasec_result_data['preference'] = ""
+        preferences = self.riasec_result_data['preference'].iloc[0].split(", ") if not self.riasec_result_data['preference'].empty else []
+        if preference not in preferences:
+            preferences.append(preference)
+        self.riasec_result_data['preference'] = ", ".join(set(preferences))
+        print(self.riasec_result_data['preference'])
+
+    def start_turn(self, vacancy_cards=None):
+        """Stream this turn's vacancy cards into `vacancy_cards`, a container of the current script run."""
+        self.vacancy_cards = vacancy_cards
+        self.shown_vacancy_cards = []
+
+    def end_turn(self):
+        """Stop streaming into the turn's container, the next rerun draws a new one. Returns the cards shown."""
+        self.vacancy_cards = None
+        return self.shown_vacancy_cards
+
+    async def record_new_preference(self, preference: str):
+        """
+        Detect user's job preferences everytime user mention anything that can be interpreted as a preference towards a job. The job preference should be in the form of keywords such as "marketing", "remote work," "full-stack development," "data analysis", "machine learning", "creative writing", and others. If the preference was "career assessment" or anything that asked the previously tested riasec assessment, skip this tool.
+        """
+
+        if "riasec" not in preference.lower():
+            self.add_preference(preference)
+        return "User preference is stored"
+
+    async def search_job_vacancy(self) -> str:
+        """
+        Searches the Alumni Petra database for a list of job vacancies. Jobs are shown in a numbered list format. For each job you must explain why that job matches user's RIASEC result.
+        If the user seems to be interested in certain jobs or want to explore other options related to their RIASEC test result and preferences, use this tool as well.
+        """
+
+        try:
+
+            top_3 = self.top_3
+            keyword = list(top_3[0].keys())[0] + ", " + list(top_3[1].keys())[0] + ", " + list(top_3[2].keys())[0]
+            # Each preference is its own facet, so a new preference only rates that facet.
+            # The RIASEC part is ranked with the precomputed affinity matrix.
+            facets = []
+            if 'preference' in self.riasec_result_data.columns and not self.riasec_result_data['preference'].empty:
+                facets = sorted(set(self.riasec_result_data['preference'].iloc[0].split(", ")))
+                keyword += ", " + ", ".join(facets)
+            print("Keywords:", keyword)
+
+            riasec_scores = {row['Type']: row['Total Score'] for index, row in self.riasec_result_data.iterrows()}
+            # Jobs arrive as soon as they are rated high enough, and rating stops once five vacancies are found
+            relevant_slugs = (job['Link'][35:] for job in self.ranker.iter_rank(facets, riasec_scores=riasec_scores))
+            output = ""
+            mode = "compact" if self.vacancy_cards is not None else SEARCH_OUTPUT_MODE
+            # The top vacancies are fetched a few at once, in ranking order, and shown as soon as they arrive
+            for idx, (slug, vacancy) in enumerate(iter_vacancies(relevant_slugs, 5), start=1):
+                if self.vacancy_cards is not None:
+                    card = vacancy_card(idx, slug, vacancy)
+                    self.vacancy_cards.markdown(card)
+                    self.shown_vacancy_cards.append(card)
+                output += format_vacancy(idx, slug, vacancy, keyword, mode)
+            petra_client.print_latency_stats()
+            output += search_instructions(mode, cards_shown=self.vacancy_cards is not None and output != "")
+            print(f"search_job_vacancy observation ({mode}): {count_tokens(output)} tokens")
+            return output
+        except Exception as e:
+            return f"Error fetching jobs: {str(e)}"
+
+    async def provide_topic_for_educational_content(self):
+        """
+        You are a topic generation expert. Your task is to:
+        1. Take a user's RIASEC test result as input.
+        2. Identify the most relevant occupations suited for the given RIASEC profile.
+        3. Generate a topic for educational content that would help the user prepare for those occupations.
+        Output the topic in a single sentence, focusing on specific skills, knowledge, or training areas.
+
+        """
+
+        this_system_prompt = """
+        You are a topic generation expert. Your task is to:
+        1. Take a user's RIASEC test result as input.
+        2. Identify the most relevant occupations suited for the given RIASEC profile.
+        3. Generate a topic for educational content that would help the user prepare for those occupations.
+        Output the topic in a single sentence, focusing on specific skills, knowledge, or training areas.
+
+        """
+
+        holland_docs = SimpleDirectoryReader("docs").load_data()
+        index = VectorStoreIndex.from_documents(holland_docs)
+        query_engine = index.as_query_engine(
+            chat_mode="context",
+            memory=self.memory,
+            system_prompt = this_system_prompt,
+            verbose=True
+        )
+
+        response = query_engine.query(f"Generate a topic for {self.top_3}")
+
+        return response
+
+    async def search_educational_content(self, topic: str):
+        """Search for educational content based on user job recommendation using DuckDuckGo. Call other tool to provide a topic."""
+
+        try:
+            results = self.web_search(f"educational content for {topic} {datetime.now().strftime('%Y-%m')}", max_results=1)
+            if results:
+                print(results)
+                educational_content = "\n\n".join([
+                    f"Title: {result['title']}\nURL: {result['href']}\nSummary: {result['body']}"
+                    for result in results
+                ])
+                educational_content += f"Show to user the summary and reason why the content match user RIASEC result ({self.top_3}). ALWAYS show user the URL. DON'T call other tools again."
+                return educational_content
+            return f"No educational content found for {self.top_3}."
+        except Exception as e:
+            return f"Error fetching educational content. {str(e)}"
+
+    async def get_job_details(self, job_slug: str):
+        """Fetch detailed information about a specific job based on its slug."""
+        try:
+            # Served from the local vacancy mirror when it has the slug
+            vacancy = fetch_vacancy(job_slug)
+            if vacancy is not None:
+                data = {'vacancy': vacancy}
+                keyword = ", ".join(list(type_score.keys())[0] for type_score in self.top_3)
+                salary_start = data['vacancy']['salary_start'] or ''
+                salary_end = data['vacancy']['salary_end'] or ''
+                salary_info = f"{salary_start} - {salary_end}" if salary_start or salary_end else 'Tidak ada informasi'
+
+                output = f"""
+                {data['vacancy']['position_name']} at {data['vacancy']['mh_company']['name']}
+                Lokasi: {data['vacancy']['mh_city']['name']}
+                Tipe: {data['vacancy']['type']}
+                Sistem: {data['vacancy']['system']}
+                Level Pendidikan: {data['vacancy']['level_education']}
+                Range Gaji: {salary_info}
+                Batas Apply: {data['vacancy']['expired_date']}
+                Deskripsi: {html_to_text(data['vacancy']['description'])}
+                Job Requirements: {html_to_text(data['vacancy']['requirement'])}
+                <Provide a reason why this job match user's RIASEC result and preference ({keyword})
+                Link: https://alumni.petra.ac.id/vacancy/{job_slug} [ALWAYS SHOW THIS TO USER]
+                """
+                print(f"get_job_details observation: {count_tokens(output)} tokens")
+                return output
+            else:
+                return f"Failed to fetch details for job ID: {job_slug}"
+        except Exception as e:
+            return f"Error fetching job details: {str(e)}"
+
+
+# Tools that change the session, a turn that calls them can't be answered from the response cache
+STATEFUL_TOOLS = {"record_new_preference"}
+
+
+def build_tools(session):
+    """The five Search page tools, bound to one session."""
+    alumni_job_tool = FunctionTool.from_defaults(async_fn=session.search_job_vacancy)
+    educational_content_tool = FunctionTool.from_defaults(async_fn=session.search_educational_content)
+    record_preference_tool = FunctionTool.from_defaults(async_fn=session.record_new_preference)
+    job_detail_tool = FunctionTool.from_defaults(async_fn=session.get_job_details)
+    provide_topic_tool = FunctionTool.from_defaults(async_fn=session.provide_topic_for_educational_content)
+
+    return [record_preference_tool, alumni_job_tool, job_detail_tool, provide_topic_tool, educational_content_tool]
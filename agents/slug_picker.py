@@ -4,7 +4,7 @@ from swarm import Swarm, Agent
 from datetime import datetime
 from dotenv import load_dotenv
 import pandas as pd
-import requests
+from agents import petra_client
 from bs4 import BeautifulSoup
 from llama_index.core.agent import ReActAgent
 from llama_index.core.tools import FunctionTool
@@ -25,7 +25,7 @@ def search_job_vacancy_riasec(keyword: str = "") -> str:
     You should specify a keyword for the job position and search for the jobs. 
     Jobs are shown in a numbered list format, with an explanation if requested.
     """
-    r = requests.get('https://panel-alumni.petra.ac.id/api/vacancy', {
+    r = petra_client.get('/api/vacancy', {
         "page": 1,
         "type": "freelance,fulltime,parttime,internship",
         "system": "onsite,remote,hybrid",
@@ -0,0 +1,87 @@
+import os
+from typing import Any, List, Optional
+from llama_index.core.llms import ChatMessage, MessageRole
+from llama_index.core.memory import ChatMemoryBuffer
+from llama_index.core.bridge.pydantic import Field
+
+# Tokens of chat history sent with every prompt, summary included
+CHAT_MEMORY_TOKEN_LIMIT = int(os.getenv("CHAT_MEMORY_TOKEN_LIMIT", 4096))
+# Latest user turns kept word for word, older ones are folded into the summary
+CHAT_MEMORY_KEEP_TURNS = int(os.getenv("CHAT_MEMORY_KEEP_TURNS", 3))
+
+SUMMARY_PROMPT = """Progressively summarize the conversation between a student and a career advisor, adding onto the previous summary and returning a new summary.
+Keep the student's RIASEC result, their preferences, the jobs and links they were shown and any question still open. Write at most 200 words, in the language of the conversation.
+
+Previous summary:
+{summary}
+
+New lines of conversation:
+{lines}
+
+New summary:"""
+
+
+class RollingSummaryMemory(ChatMemoryBuffer):
+    """Chat memory that keeps the latest turns verbatim and an incrementally updated summary of the rest.
+
+    Every message stays in the chat store, but get() only returns the summary (as a system
+    message) and the last `keep_turns` user turns. Turns that leave that window are folded
+    into the summary with one LLM call each time, and older turns are folded early if the
+    history would still exceed `token_limit`.
+    """
+
+    keep_turns: int = Field(default=CHAT_MEMORY_KEEP_TURNS)
+    summary: str = Field(default="")
+    # Number of messages of the chat store already folded into the summary
+    summarized: int = Field(default=0)
+    summary_llm: Optional[Any] = Field(default=None, exclude=True)
+
+    @classmethod
+    def from_budget(cls, llm, token_limit=CHAT_MEMORY_TOKEN_LIMIT, keep_turns=CHAT_MEMORY_KEEP_TURNS, chat_history=None):
+        memory = cls.from_defaults(token_limit=token_limit, chat_history=chat_history)
+        memory.keep_turns = keep_turns
+        memory.summary_llm = llm
+        return memory
+
+    def count_tokens(self, messages):
+        return sum(len(self.tokenizer_fn(str(message.content or ""))) for message in messages)
+
+    def fold(self, messages):
+        """Add `messages` to the summary. If the LLM call fails the summary stays as it was."""
+        lines = "\n".join(f"{message.role.value}: {message.content}" for message in messages if message.content)
+        if not lines:
+            return
+        try:
+            self.summary = str(self.summary_llm.complete(SUMMARY_PROMPT.format(summary=self.summary or "(none)", lines=lines))).strip()
+        except Exception as e:
+            print(f"Summarizing chat history failed, dropping {len(messages)} messages: {e}")
+
+    def get(self, input: Optional[str] = None, initial_token_count: int = 0, **kwargs: Any) -> List[ChatMessage]:
+        messages = self.chat_store.get_messages(self.chat_store_key)
+        turn_starts = [i for i, message in enumerate(messages) if message.role == MessageRole.USER and i >= self.summarized]
+        keep_from = max(self.summarized, turn_starts[-self.keep_turns] if len(turn_starts) >= self.keep_turns else 0)
+        while True:
+            if keep_from > self.summarized:
+                self.fold(messages[self.summarized:keep_from])
+                self.summarized = keep_from
+            history = ([ChatMessage(role=MessageRole.SYSTEM, content=f"Summary of the earlier conversation: {self.summary}")] if self.summary else []) + messages[keep_from:]
+            tokens = self.count_tokens(history)
+            later_turns = [i for i in turn_starts if i > keep_from]
+            if tokens + initial_token_count <= self.token_limit or not later_turns:
+                break
+            # Still over budget, fold the oldest verbatim turn as well
+            keep_from = later_turns[0]
+        print(f"Chat memory: {tokens} tokens ({len(messages) - keep_from} messages verbatim, {self.count_tokens(history[:1]) if self.summary else 0} tokens of summary over {self.summarized} messages), {initial_token_count} more in the prompt")
+        return history
+
+    def set(self, messages: List[ChatMessage]) -> None:
+        super().set(messages)
+        if self.summarized > len(messages):
+            # The history was replaced, the summary no longer describes it
+            self.summary = ""
+            self.summarized = 0
+
+    def reset(self) -> None:
+        super().reset()
+        self.summary = ""
+        self.summarized = 0
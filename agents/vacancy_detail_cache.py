@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from agents import petra_client
+
+directory = './cache'
+if not os.path.exists(directory):
+    os.makedirs(directory)
+DETAIL_CACHE_FILE = './cache/vacancy_details.json'
+# Seconds a cached vacancy is served before it is revalidated
+DETAIL_CACHE_EXPIRATION = int(os.getenv("DETAIL_CACHE_EXPIRATION", 21600))
+
+_entries = None
+_lock = threading.Lock()
+stats = {"hits": 0, "revalidated": 0, "stale": 0, "misses": 0}
+# Statuses meaning the vacancy was removed, only these drop a cached copy
+GONE_STATUSES = (404, 410)
+
+
+def load_cache():
+    """Load the detail cache file once per process."""
+    global _entries
+    if _entries is None:
+        _entries = {}
+        if os.path.exists(DETAIL_CACHE_FILE):
+            try:
+                with open(DETAIL_CACHE_FILE, 'r') as f:
+                    _entries = json.load(f)
+            except json.JSONDecodeError:
+                print("Vacancy detail cache file is invalid JSON. Resetting cache.")
+    return _entries
+
+
+def save_cache():
+    with _lock:
+        temp_file = DETAIL_CACHE_FILE + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(load_cache(), f)
+        os.replace(temp_file, DETAIL_CACHE_FILE)
+
+
+def expires_at(vacancy, fetched_at):
+    """An entry expires after DETAIL_CACHE_EXPIRATION, or at the end of the vacancy's expired_date if that comes first."""
+    expiry = fetched_at + DETAIL_CACHE_EXPIRATION
+    try:
+        expired_date = datetime.strptime(str(vacancy.get('expired_date'))[:10], "%Y-%m-%d") + timedelta(days=1)
+        expiry = min(expiry, expired_date.timestamp())
+    except ValueError:
+        pass
+    return expiry
+
+
+def store(slug, vacancy, r):
+    now = time.time()
+    with _lock:
+        load_cache()[slug] = {
+            'vacancy': vacancy,
+            'etag': r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified'),
+            'fetched_at': now,
+            'expires_at': expires_at(vacancy, now),
+        }
+    save_cache()
+
+
+def get_vacancy(slug):
+    """Returns the vacancy JSON of `slug`, served locally while the cached copy is fresh.
+
+    Stale copies are revalidated with If-None-Match/If-Modified-Since when the server sent
+    an ETag or Last-Modified, so an unchanged vacancy costs a 304 instead of a download.
+    If the API fails for any other reason than the vacancy being gone (404/410), the stale
+    copy is served. Returns None if the vacancy is gone.
+    """
+    with _lock:
+        entry = load_cache().get(slug)
+    if entry is not None and time.time() < entry['expires_at']:
+        stats["hits"] += 1
+        return entry['vacancy']
+
+    headers = {}
+    if entry is not None and entry['etag']:
+        headers['If-None-Match'] = entry['etag']
+    if entry is not None and entry['last_modified']:
+        headers['If-Modified-Since'] = entry['last_modified']
+    try:
+        r = petra_client.get(f'/api/vacancy/{slug}', headers=headers)
+    except petra_client.RequestError as e:
+        if entry is None:
+            raise
+        print(f"Revalidating vacancy {slug} failed ({e}), serving the stale copy")
+        stats["stale"] += 1
+        return entry['vacancy']
+    print(r, f'for link: {petra_client.PETRA_API_URL}/api/vacancy/{slug}')
+
+    if r.status_code == 304 and entry is not None:
+        stats["revalidated"] += 1
+        now = time.time()
+        with _lock:
+            entry['fetched_at'] = now
+            entry['expires_at'] = expires_at(entry['vacancy'], now)
+        save_cache()
+        return entry['vacancy']
+
+    stats["misses"] += 1
+    if r.status_code in GONE_STATUSES:
+        if entry is not None:
+            with _lock:
+                load_cache().pop(slug, None)
+            save_cache()
+        return None
+    if r.status_code != 200:
+        # Rate limits and server errors that outlasted the retries say nothing about the vacancy
+        if entry is not None:
+            print(f"Revalidating vacancy {slug} got {r.status_code}, serving the stale copy")
+            stats["stale"] += 1
+            return entry['vacancy']
+        return None
+    vacancy = r.json()['vacancy']
+    store(slug, vacancy, r)
+    return vacancy
@@ -0,0 +1,58 @@
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from agents import petra_client
+from agents import vacancy_detail_cache
+from agents import vacancy_mirror
+
+# Extra slugs fetched with every round so a few dead vacancies don't need another round trip
+DETAIL_OVERFETCH = int(os.getenv("DETAIL_OVERFETCH", 3))
+DETAIL_CONCURRENCY = int(os.getenv("DETAIL_CONCURRENCY", 8))
+
+
+def fetch_vacancy(slug):
+    """Returns the vacancy JSON of `slug` from the local mirror, or from the detail cache if the mirror doesn't have it.
+
+    Expired vacancies are not served from the mirror, so the detail cache checks them with the API.
+
+    Returns None if it can't be fetched.
+    """
+    try:
+        vacancy = vacancy_mirror.get_vacancy(slug)
+    except sqlite3.Error as e:
+        print(f"Vacancy mirror lookup of {slug} failed, using the detail cache: {e}")
+        vacancy = None
+    if vacancy is not None:
+        return vacancy
+    try:
+        return vacancy_detail_cache.get_vacancy(slug)
+    except petra_client.RequestError + (ValueError, KeyError) as e:
+        print(f"Failed to fetch vacancy {slug}: {e}")
+        return None
+
+
+def iter_vacancies(slugs, limit, overfetch=DETAIL_OVERFETCH, concurrency=DETAIL_CONCURRENCY):
+    """Yield the first `limit` available vacancies of `slugs` as (slug, vacancy) pairs, in the order of `slugs`.
+
+    Each round requests the missing number of vacancies plus `overfetch` more at once,
+    skipping the ones that fail. A vacancy is yielded as soon as it and every vacancy
+    ranked above it have arrived. `slugs` may be a generator, it is only advanced as far as
+    the rounds need, so a ranking that is still running can stop early.
+    """
+    slugs = iter(slugs)
+    found = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        while found < limit:
+            window = list(islice(slugs, limit - found + overfetch))
+            if not window:
+                break
+            for slug, vacancy in zip(window, executor.map(fetch_vacancy, window)):
+                if vacancy is not None and found < limit:
+                    found += 1
+                    yield slug, vacancy
+
+
+def fetch_vacancies(slugs, limit, overfetch=DETAIL_OVERFETCH, concurrency=DETAIL_CONCURRENCY):
+    """Fetch the details of the first `limit` available vacancies of `slugs` concurrently, see iter_vacancies."""
+    return list(iter_vacancies(slugs, limit, overfetch, concurrency))
@@ -0,0 +1,76 @@
+import os
+from agents.html_text import html_to_text
+
+# "full" pastes every detail into the tool observation, "compact" only the key fields
+SEARCH_OUTPUT_MODE = os.getenv("SEARCH_OUTPUT_MODE", "full")
+# Render each vacancy as a card in the chat as soon as it arrives, the LLM then only explains the matches
+STREAM_VACANCY_CARDS = os.getenv("STREAM_VACANCY_CARDS", "True").lower() in ("1", "true", "yes")
+# Characters of the description kept in compact mode
+COMPACT_DESCRIPTION_LENGTH = int(os.getenv("COMPACT_DESCRIPTION_LENGTH", 160))
+
+_tokenizer = None
+
+
+def count_tokens(text):
+    """Number of tokens of `text` with llama_index's default tokenizer."""
+    global _tokenizer
+    if _tokenizer is None:
+        from llama_index.core.utils import get_tokenizer
+        _tokenizer = get_tokenizer()
+    return len(_tokenizer(text))
+
+
+def truncate(text, length):
+    text = " ".join(text.split())
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(" ", 1)[0] + "..."
+
+
+def salary_info(vacancy):
+    salary_start = vacancy['salary_start'] if vacancy['salary_start'] is not None else ''
+    salary_end = vacancy['salary_end'] if vacancy['salary_end'] is not None else ''
+    return f"{salary_start} - {salary_end}" if salary_start or salary_end else 'Tidak ada informasi'
+
+
+def format_vacancy(idx, slug, vacancy, keyword, mode=SEARCH_OUTPUT_MODE):
+    """One numbered vacancy of a search_job_vacancy observation."""
+    if mode == "compact":
+        return f"""
+                {idx}. {vacancy['position_name']} at {vacancy['mh_company']['name']}
+                Lokasi: {vacancy['mh_city']['name']} | Tipe: {vacancy['type']} | Sistem: {vacancy['system']} | Level Pendidikan: {vacancy['level_education']}
+                Range Gaji: {salary_info(vacancy)} | Batas Apply: {vacancy["expired_date"]}
+                Deskripsi: {truncate(html_to_text(vacancy['description']), COMPACT_DESCRIPTION_LENGTH)}
+                <A reason why this job match user's RIASEC result (Why {vacancy['position_name']} match {keyword})>
+                Link: https://alumni.petra.ac.id/vacancy/{slug} [ALWAYS SHOW URL TO USER]
+                slug = {slug} (for get_job_details, DO NOT show this to the user)
+            """
+    return f"""
+                {idx}. {vacancy['position_name']} at {vacancy['mh_company']['name']}
+                Lokasi: {vacancy['mh_city']['name']}
+                Tipe: {vacancy['type']}
+                Sistem: {vacancy['system']}
+                Level Pendidikan: {vacancy['level_education']}
+                Range Gaji: {salary_info(vacancy)}
+                Batas Apply: {vacancy["expired_date"]}
+                Deskripsi: {html_to_text(vacancy['description'])}
+                Job Requirements: {html_to_text(vacancy['requirement'])}
+                <A reason why this job match user's RIASEC result (Why {vacancy['position_name']} match {keyword})>
+                Link: https://alumni.petra.ac.id/vacancy/{slug} [ALWAYS SHOW URL TO USER]
+            """
+
+
+def vacancy_card(idx, slug, vacancy):
+    """Markdown card shown in the chat while the LLM is still working on its answer."""
+    return f"""**{idx}. [{vacancy['position_name']}](https://alumni.petra.ac.id/vacancy/{slug})** at {vacancy['mh_company']['name']}  
+📍 {vacancy['mh_city']['name']} · {vacancy['type']} · {vacancy['system']} · {vacancy['level_education']}  
+💰 {salary_info(vacancy)} · ⏳ {vacancy["expired_date"]}
+"""
+
+
+def search_instructions(mode=SEARCH_OUTPUT_MODE, cards_shown=False):
+    if cards_shown:
+        return "\n\nThese vacancies are ALREADY SHOWN to the user as cards with their location, type, system, educational level, salary range, application deadline and URL. DO NOT repeat those details. For each job, by its number, explain briefly why it matches the user's RIASEC result. If the user asks for the full description or requirements of a job, use get_job_details with its slug. DON'T call other tools again."
+    if mode == "compact":
+        return "\n\nShow it directly to user with location, type, system, educational level, salary range, application deadline, short description, reason why that job match user RIASEC result, and URL of the job posting. If the user asks for the full description or requirements of a job, use get_job_details with its slug. DON'T call other tools again."
+    return "\n\nShow it directly to user with location, type, system, educational level, salary range, application deadline, description, job requirements, reason why that job match user RIASEC result, and URL of the job posting. DON'T call other tools again."
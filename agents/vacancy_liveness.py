@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from agents import petra_client
+from agents.vacancy_detail_cache import GONE_STATUSES
+
+directory = './cache'
+if not os.path.exists(directory):
+    os.makedirs(directory)
+LIVENESS_FILE = './cache/vacancy_liveness.json'
+# How old a slug's last check may be before the background refresh checks it again
+LIVENESS_REFRESH_INTERVAL = int(os.getenv("LIVENESS_REFRESH_INTERVAL", 21600))
+PETRA_CONCURRENCY = int(os.getenv("PETRA_CONCURRENCY", 1))
+
+_index = None
+_lock = threading.Lock()
+_refresh_thread = None
+# Caps the liveness checks in flight toward the Petra API for the whole process
+_petra_slots = threading.BoundedSemaphore(max(1, PETRA_CONCURRENCY))
+
+def load_index():
+    """Load the liveness index file once per process."""
+    global _index
+    if _index is None:
+        _index = {}
+        if os.path.exists(LIVENESS_FILE):
+            try:
+                with open(LIVENESS_FILE, 'r') as f:
+                    _index = json.load(f)
+            except json.JSONDecodeError:
+                print("Liveness index is invalid JSON. Resetting index.")
+    return _index
+
+def save_index():
+    with _lock:
+        temp_file = LIVENESS_FILE + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(load_index(), f)
+        os.replace(temp_file, LIVENESS_FILE)
+
+def parse_expired_date(expired_date):
+    try:
+        return datetime.strptime(str(expired_date)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+def check_vacancy(slug):
+    """Ask the Petra API about one slug and return its index entry.
+
+    Only 404 and 410 mark a vacancy as gone. Any other failure, like a 429 or a 5xx that
+    outlasted the client's retries, is stored as status None and checked again next refresh.
+    """
+    expired_date = None
+    try:
+        with _petra_slots:
+            r = petra_client.get(f'/api/vacancy/{slug}')
+        status = r.status_code
+        if status == 200:
+            expired_date = r.json()['vacancy'].get('expired_date')
+        elif status not in GONE_STATUSES:
+            print(f"Liveness check failed for {slug}: HTTP {status}")
+            status = None
+    except petra_client.RequestError + (ValueError, KeyError) as e:
+        print(f"Liveness check failed for {slug}: {e}")
+        status = None
+    return {'status': status, 'checked_at': time.time(), 'expired_date': expired_date}
+
+def is_stale(slug):
+    entry = load_index().get(slug)
+    if entry is None or entry['status'] not in (200,) + GONE_STATUSES:
+        return True
+    return time.time() - entry['checked_at'] >= LIVENESS_REFRESH_INTERVAL
+
+def refresh(slugs, concurrency=PETRA_CONCURRENCY):
+    """Re-check every stale slug and persist the index if any status or expired_date changed."""
+    stale = [slug for slug in slugs if is_stale(slug)]
+    if not stale:
+        return
+    print(f"Refreshing liveness of {len(stale)} vacancies")
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        entries = list(executor.map(check_vacancy, stale))
+    with _lock:
+        index = load_index()
+        changed = False
+        for slug, entry in zip(stale, entries):
+            previous = index.get(slug)
+            if previous is None or (previous['status'], previous['expired_date']) != (entry['status'], entry['expired_date']):
+                changed = True
+            index[slug] = entry
+    # When only the check times moved the file is left alone, a restarted process checks those slugs again
+    if changed:
+        save_index()
+
+def refresh_in_background(slugs, concurrency=PETRA_CONCURRENCY):
+    """Start a refresh thread unless one is already running."""
+    global _refresh_thread
+    with _lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return
+        _refresh_thread = threading.Thread(target=refresh, args=(list(slugs), concurrency), daemon=True)
+        _refresh_thread.start()
+
+def is_live(slug, today=None):
+    """A vacancy is live unless the API answered 404/410 for it or its expired_date has passed.
+
+    Slugs that were never checked, or whose check failed otherwise, count as live until the
+    background refresh gets an answer for them.
+    """
+    entry = load_index().get(slug)
+    if entry is None or entry['status'] not in (200,) + GONE_STATUSES:
+        return True
+    if entry['status'] in GONE_STATUSES:
+        return False
+    expired_date = parse_expired_date(entry['expired_date'])
+    return expired_date is None or expired_date >= (today or datetime.now().date())
+
+def version(today=None):
+    """A hash of the slugs that are not live, changes only when a vacancy goes or comes back."""
+    dead = sorted(slug for slug in list(load_index()) if not is_live(slug, today))
+    return hashlib.sha1("\n".join(dead).encode()).hexdigest()
@@ -0,0 +1,292 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from agents import petra_client
+
+directory = './cache'
+if not os.path.exists(directory):
+    os.makedirs(directory)
+MIRROR_FILE = './cache/vacancies.db'
+# Seconds between background syncs
+MIRROR_SYNC_INTERVAL = int(os.getenv("MIRROR_SYNC_INTERVAL", 3600))
+# Seconds between full syncs, which also drop vacancies deleted upstream
+MIRROR_FULL_SYNC_INTERVAL = int(os.getenv("MIRROR_FULL_SYNC_INTERVAL", 86400))
+SYNC_PAGE_SIZE = 1000
+
+_lock = threading.Lock()
+_sync_thread = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vacancies (
+    slug TEXT PRIMARY KEY,
+    position_name TEXT,
+    company TEXT,
+    city TEXT,
+    id_mh_city INTEGER,
+    id_mh_province INTEGER,
+    type TEXT,
+    system TEXT,
+    level_education TEXT,
+    salary_start INTEGER,
+    salary_end INTEGER,
+    expired_date TEXT,
+    updated_at TEXT,
+    raw TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS vacancies_fts USING fts5(
+    slug UNINDEXED, position_name, company, city, description, requirement,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def connect():
+    connection = sqlite3.connect(MIRROR_FILE, timeout=30)
+    connection.row_factory = sqlite3.Row
+    # Readers keep working while a sync writes
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def strip_html(html):
+    return re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", html or "")).strip()
+
+
+def get_state(connection, key):
+    row = connection.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+    return row['value'] if row else None
+
+
+def set_state(connection, key, value):
+    connection.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def upsert_vacancy(connection, d):
+    company = d.get('mh_company') or {}
+    city = d.get('mh_city') or {}
+    connection.execute(
+        "INSERT OR REPLACE INTO vacancies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            d['slug'], d.get('position_name'), company.get('name'), city.get('name'),
+            d.get('id_mh_city') or city.get('id'), d.get('id_mh_province') or city.get('id_mh_province'),
+            d.get('type'), d.get('system'), d.get('level_education'),
+            d.get('salary_start'), d.get('salary_end'), d.get('expired_date'), d.get('updated_at'),
+            json.dumps(d),
+        ),
+    )
+    connection.execute("DELETE FROM vacancies_fts WHERE slug = ?", (d['slug'],))
+    connection.execute(
+        "INSERT INTO vacancies_fts (slug, position_name, company, city, description, requirement) VALUES (?, ?, ?, ?, ?, ?)",
+        (d['slug'], d.get('position_name'), company.get('name'), city.get('name'), strip_html(d.get('description')), strip_html(d.get('requirement'))),
+    )
+
+
+def fetch_page(page):
+    r = petra_client.get('/api/vacancy', {
+        "page": page,
+        "type": "freelance,fulltime,parttime,internship",
+        "system": "onsite,remote,hybrid",
+        "level_education": "diploma,sarjana,magister,doktor",
+        "keyword": "",
+        "salary_range": "",
+        "id_mh_province": "",
+        "id_mh_city": "",
+        "perPage": SYNC_PAGE_SIZE,
+        "orderBy": "updated_at",
+        "order": "DESC",
+        "skills": "",
+        "prody": "",
+    }, timeout=(petra_client.CONNECT_TIMEOUT, 120))
+    r.raise_for_status()
+    return r.json()["vacancies"]
+
+
+def prune(connection, slugs):
+    """Delete every mirrored vacancy whose slug is not in `slugs`, returns how many were deleted."""
+    stale = [row['slug'] for row in connection.execute("SELECT slug FROM vacancies") if row['slug'] not in slugs]
+    for slug in stale:
+        connection.execute("DELETE FROM vacancies WHERE slug = ?", (slug,))
+        connection.execute("DELETE FROM vacancies_fts WHERE slug = ?", (slug,))
+    return len(stale)
+
+
+def sync(full=False):
+    """Mirror vacancies updated since the last sync, newest first, and return how many were stored.
+
+    Pages are read in updated_at order until a vacancy older than the previous sync's newest
+    one shows up. `full` ignores that watermark, reads every page and removes the vacancies
+    the API no longer returns.
+    """
+    with _lock:
+        start_time = time.time()
+        connection = connect()
+        try:
+            watermark = None if full else get_state(connection, 'last_updated_at')
+            newest = watermark
+            stored = 0
+            seen = set()
+            page = 1
+            done = False
+            while not done:
+                vacancies = fetch_page(page)
+                for d in vacancies["data"]:
+                    updated_at = d.get('updated_at') or ''
+                    if watermark is not None and updated_at < watermark:
+                        done = True
+                        break
+                    upsert_vacancy(connection, d)
+                    seen.add(d['slug'])
+                    stored += 1
+                    if newest is None or updated_at > newest:
+                        newest = updated_at
+                # Commit every page, so the write lock isn't held while the next one downloads
+                connection.commit()
+                if not vacancies["data"] or page >= vacancies.get("last_page", page):
+                    done = True
+                page += 1
+            if newest is not None:
+                set_state(connection, 'last_updated_at', newest)
+            if full:
+                removed = prune(connection, seen)
+                if removed:
+                    print(f"Removed {removed} vacancies that are gone upstream")
+                    set_state(connection, 'last_pruned_at', time.time())
+                set_state(connection, 'last_full_synced_at', time.time())
+            set_state(connection, 'last_synced_at', time.time())
+            connection.commit()
+        finally:
+            connection.close()
+        print(f"Synced {stored} vacancies in {time.time() - start_time:.4f} seconds")
+        return stored
+
+
+def last_synced_at():
+    connection = connect()
+    try:
+        value = get_state(connection, 'last_synced_at')
+        return float(value) if value is not None else None
+    finally:
+        connection.close()
+
+
+def data_version():
+    """Changes whenever a sync stores new or edited vacancies or removes deleted ones."""
+    connection = connect()
+    try:
+        return f"{get_state(connection, 'last_updated_at')}|{get_state(connection, 'last_pruned_at')}"
+    finally:
+        connection.close()
+
+
+def is_populated():
+    return last_synced_at() is not None
+
+
+def sync_in_background(interval=MIRROR_SYNC_INTERVAL):
+    """Start a sync thread if the mirror is older than `interval` and no sync is running.
+
+    The sync is a full one when the last full sync is older than MIRROR_FULL_SYNC_INTERVAL.
+    """
+    global _sync_thread
+    if _sync_thread is not None and _sync_thread.is_alive():
+        return
+    try:
+        synced_at = last_synced_at()
+        if synced_at is not None and time.time() - synced_at < interval:
+            return
+        connection = connect()
+        try:
+            full_synced_at = get_state(connection, 'last_full_synced_at')
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        # The details then come from the detail cache and the API, try again on the next call
+        print(f"Vacancy mirror is unavailable: {e}")
+        return
+    full = full_synced_at is None or time.time() - float(full_synced_at) >= MIRROR_FULL_SYNC_INTERVAL
+
+    def run():
+        try:
+            sync(full=full)
+        except petra_client.RequestError + (ValueError, KeyError, sqlite3.Error) as e:
+            print(f"Vacancy mirror sync failed: {e}")
+
+    _sync_thread = threading.Thread(target=run, daemon=True)
+    _sync_thread.start()
+
+
+def get_vacancy(slug):
+    """Returns the mirrored vacancy JSON of `slug`, shaped like the API's, or None if it isn't mirrored or has expired."""
+    connection = connect()
+    try:
+        row = connection.execute(
+            "SELECT raw FROM vacancies WHERE slug = ? AND (expired_date IS NULL OR expired_date >= ?)",
+            (slug, datetime.now().strftime("%Y-%m-%d")),
+        ).fetchone()
+        return json.loads(row['raw']) if row else None
+    finally:
+        connection.close()
+
+
+def fts_query(keyword):
+    """Turn free text into an FTS5 query matching any of its words, prefixes included."""
+    words = re.findall(r"\w+", str(keyword).lower())
+    return " OR ".join(f'"{word}"*' for word in words)
+
+
+def search(keyword="", limit=5, start_salary=None, end_salary=None, id_mh_province=None, id_mh_city=None, include_expired=False):
+    """Full-text search the mirror, best match first (newest first without a keyword).
+
+    Returns vacancy JSONs shaped like the items of the API's vacancy list.
+    """
+    conditions = []
+    params = []
+    if not include_expired:
+        conditions.append("(v.expired_date IS NULL OR v.expired_date >= ?)")
+        params.append(datetime.now().strftime("%Y-%m-%d"))
+    if start_salary:
+        conditions.append("(v.salary_end IS NULL OR v.salary_end >= ?)")
+        params.append(int(start_salary))
+    if end_salary:
+        conditions.append("(v.salary_start IS NULL OR v.salary_start <= ?)")
+        params.append(int(end_salary))
+    if id_mh_province:
+        conditions.append("v.id_mh_province = ?")
+        params.append(int(id_mh_province))
+    if id_mh_city:
+        conditions.append("v.id_mh_city = ?")
+        params.append(int(id_mh_city))
+
+    query = fts_query(keyword)
+    if query:
+        sql = "SELECT v.raw FROM vacancies_fts JOIN vacancies v ON v.slug = vacancies_fts.slug WHERE vacancies_fts MATCH ?"
+        params.insert(0, query)
+        order = "bm25(vacancies_fts, 0, 10.0, 2.0, 2.0, 1.0, 1.0)"
+    else:
+        sql = "SELECT v.raw FROM vacancies v WHERE 1 = 1"
+        order = "v.updated_at DESC"
+    for condition in conditions:
+        sql += " AND " + condition
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(limit)
+
+    connection = connect()
+    try:
+        return [json.loads(row['raw']) for row in connection.execute(sql, params)]
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    # python -m agents.vacancy_mirror [--full]
+    import sys
+    sync(full="--full" in sys.argv)
@@ -0,0 +1,168 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from flask import Flask, jsonify, request, make_response
+from werkzeug.serving import make_server
+
+# Offline stand-in for panel-alumni.petra.ac.id, serving recorded fixtures.
+#
+#   python fetch/petra_stub_server.py --record           # record fixtures from the real API
+#   python fetch/petra_stub_server.py --latency 0.2 --error-rate 0.05
+#   PETRA_API_BASE_URL=http://127.0.0.1:5050 streamlit run Hello.py
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+VACANCIES_FIXTURE = 'vacancies.json'
+PROVINCES_FIXTURE = 'provinces.json'
+
+
+def load_fixture(fixtures_dir, name, default):
+    path = os.path.join(fixtures_dir, name)
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def synthetic_vacancies():
+    """Vacancies made up from the job catalog, used until real fixtures are recorded."""
+    from agents.job_catalog import load_job_catalog
+    jobs = load_job_catalog()
+    vacancies = []
+    for i, job in enumerate(jobs.itertuples()):
+        vacancies.append({
+            'id': i + 1,
+            'slug': job.Link[35:],
+            'position_name': str(job.Position),
+            'mh_company': {'name': f'PT Stub {i + 1}'},
+            'mh_city': {'id': 1, 'name': 'Kota Surabaya', 'id_mh_province': 1},
+            'id_mh_province': 1,
+            'type': 'fulltime',
+            'system': 'onsite',
+            'level_education': 'sarjana',
+            'salary_start': None,
+            'salary_end': None,
+            'expired_date': '2099-12-31',
+            'updated_at': f'2024-01-01 00:{i // 60:02d}:{i % 60:02d}',
+            'description': f'<p>Stub description for {job.Position}.</p>',
+            'requirement': '<ul><li>Stub requirement</li></ul>',
+        })
+    return vacancies
+
+
+def create_app(fixtures_dir=FIXTURES_DIR, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """Build the stand-in app. Every request waits `latency` +- `jitter` seconds and fails with a 500 at `error_rate`."""
+    app = Flask(__name__)
+    vacancies = load_fixture(fixtures_dir, VACANCIES_FIXTURE, None)
+    if vacancies is None:
+        print(f"No {VACANCIES_FIXTURE} in {fixtures_dir}, serving vacancies made up from the job catalog")
+        vacancies = synthetic_vacancies()
+    provinces = load_fixture(fixtures_dir, PROVINCES_FIXTURE, [{'id': 1, 'name': 'Jawa Timur'}])
+    by_slug = {vacancy['slug']: vacancy for vacancy in vacancies}
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    @app.before_request
+    def simulate_network():
+        with rng_lock:
+            delay = max(0.0, latency + rng.uniform(-jitter, jitter))
+            fail = rng.random() < error_rate
+        time.sleep(delay)
+        if fail:
+            return jsonify({'message': 'Simulated server error'}), 500
+
+    def with_etag(payload):
+        body = json.dumps(payload)
+        etag = '"' + hashlib.sha1(body.encode('utf-8')).hexdigest() + '"'
+        if request.headers.get('If-None-Match') == etag:
+            return make_response('', 304, {'ETag': etag})
+        return make_response(body, 200, {'ETag': etag, 'Content-Type': 'application/json'})
+
+    @app.route('/api/vacancy', methods=['GET'])
+    def list_vacancies():
+        keyword = request.args.get('keyword', '').lower()
+        province = request.args.get('id_mh_province', '')
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('perPage', 10))
+        matches = [
+            vacancy for vacancy in vacancies
+            if (not keyword or keyword in vacancy['position_name'].lower())
+            and (not province or str(vacancy.get('id_mh_province')) == province)
+        ]
+        reverse = request.args.get('order', 'DESC').upper() == 'DESC'
+        order_by = request.args.get('orderBy', 'updated_at')
+        matches.sort(key=lambda vacancy: str(vacancy.get(order_by) or ''), reverse=reverse)
+        last_page = max(1, -(-len(matches) // per_page))
+        return jsonify({'vacancies': {
+            'current_page': page,
+            'last_page': last_page,
+            'per_page': per_page,
+            'total': len(matches),
+            'data': matches[(page - 1) * per_page:page * per_page],
+        }})
+
+    @app.route('/api/vacancy/<slug>', methods=['GET'])
+    def get_vacancy(slug):
+        if slug not in by_slug:
+            return jsonify({'message': 'Vacancy not found'}), 404
+        return with_etag({'vacancy': by_slug[slug]})
+
+    @app.route('/api/province', methods=['GET'])
+    def list_provinces():
+        return jsonify({'provinces': provinces})
+
+    return app
+
+
+def serve_in_background(app, host='127.0.0.1', port=0):
+    """Run `app` on a daemon thread and return (server, base_url). Port 0 picks a free port."""
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def record(fixtures_dir=FIXTURES_DIR):
+    """Save every vacancy of the list endpoint and every province of the real API as fixtures.
+
+    Only the list items are recorded, /api/vacancy/<slug> answers with the recorded list item.
+    """
+    from agents import petra_client
+    os.makedirs(fixtures_dir, exist_ok=True)
+    vacancies = []
+    page = 1
+    while True:
+        r = petra_client.get('/api/vacancy', {'page': page, 'perPage': 1000, 'orderBy': 'updated_at', 'order': 'DESC'}, timeout=(petra_client.CONNECT_TIMEOUT, 120))
+        data = r.json()['vacancies']
+        vacancies += data['data']
+        if not data['data'] or page >= data.get('last_page', page):
+            break
+        page += 1
+    provinces = petra_client.get('/api/province').json()['provinces']
+    with open(os.path.join(fixtures_dir, VACANCIES_FIXTURE), 'w') as f:
+        json.dump(vacancies, f)
+    with open(os.path.join(fixtures_dir, PROVINCES_FIXTURE), 'w') as f:
+        json.dump(provinces, f)
+    print(f"Recorded {len(vacancies)} vacancies and {len(provinces)} provinces to {fixtures_dir}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline stand-in server for the Petra alumni API")
+    parser.add_argument('--record', action='store_true', help="record fixtures from the real API and exit")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random +- seconds on top of the latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with a 500")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    if args.record:
+        record(args.fixtures)
+    else:
+        create_app(args.fixtures, args.latency, args.jitter, args.error_rate, args.seed).run(host=args.host, port=args.port, threaded=True)
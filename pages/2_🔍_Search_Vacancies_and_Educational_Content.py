@@ -1,22 +1,26 @@
 import streamlit as st
-from llama_index.llms.ollama import Ollama
-from llama_index.embeddings.ollama import OllamaEmbedding
 from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
 from llama_index.core.llms import ChatMessage, MessageRole
 from llama_index.core import Settings
-from llama_index.core.memory import ChatMemoryBuffer
-from llama_index.core.tools import FunctionTool
 from llama_index.core.agent import ReActAgent
 from llama_index.core import PromptTemplate
-from bs4 import BeautifulSoup
 import pandas as pd
 import nest_asyncio
 import logging
-import requests
 import sys
-from duckduckgo_search import DDGS
-from datetime import datetime
-from agents.rating_agent import get_relevant_jobs
+from dotenv import load_dotenv
+
+# The agents modules read their settings from the environment when imported
+load_dotenv()
+
+from agents.search_tools import STATEFUL_TOOLS, SearchSession, build_tools
+from agents.vacancy_format import STREAM_VACANCY_CARDS
+from agents import intent_router
+from agents import model_provider
+from agents.parallel_agent import SEARCH_AGENT_MODE, ParallelToolAgent
+from agents.summary_memory import RollingSummaryMemory
+from agents import response_cache
+from agents import vacancy_mirror
 
 nest_asyncio.apply()
 
@@ -84,7 +88,7 @@ You have access to a wide variety of tools. You are responsible for using
 the tools in any sequence you deem appropriate to complete the task at hand.
 This may require breaking the task into subtasks and using different tools
 to complete each subtask.
-Prioritize using the record preference tool every time for storing the user preference everytime user inputs, then use the other tool.
+Preferences the user states directly (e.g. "I like marketing") are already recorded before you see the message. Use the record preference tool only for preferences that are implied, then use the other tool.
 ONLY use search vacan if the user interested in exploring other options, if the user only wants to talk, noo need to use this tool.
 
 You have access to the following tools:
@@ -132,169 +136,20 @@ react_system_prompt = PromptTemplate(react_system_header_str)
 logging.basicConfig(stream=sys.stdout, level=logging.WARNING)
 logging.getLogger().addHandler(logging.StreamHandler(stream=sys.stdout))
 
-Settings.llm = Ollama(model="llama3.1:8b-instruct-q4_0", base_url="http://127.0.0.1:11434", system_prompt=system_prompt, temperature=0)
-Settings.embed_model = OllamaEmbedding(base_url="http://127.0.0.1:11434", model_name="mxbai-embed-large:latest")
+# Built once per process and kept loaded in Ollama, reruns reuse the same clients
+model_provider.warmup_in_background()
+Settings.llm = model_provider.get_llm(system_prompt=system_prompt, temperature=0)
+Settings.embed_model = model_provider.get_embed_model()
 
 
 # Declare Tools
-
-async def record_new_preference(preference: str):
-    """
-    Detect user's job preferences everytime user mention anything that can be interpreted as a preference towards a job. The job preference should be in the form of keywords such as "marketing", "remote work," "full-stack development," "data analysis", "machine learning", "creative writing", and others. If the preference was "career assessment" or anything that asked the previously tested riasec assessment, skip this tool.
-    """
-
-    if "riasec" not in preference.lower():
-        if 'preference' not in riasec_result_data.columns:
-            riasec_result_data['preference'] = ""
-        preferences = riasec_result_data['preference'].iloc[0].split(", ") if not riasec_result_data['preference'].empty else []
-        if preference not in preferences:
-            preferences.append(preference)
-        riasec_result_data['preference'] = ", ".join(set(preferences))
-        print(riasec_result_data['preference'])
-    return "User preference is stored"
-
-
-async def search_job_vacancy() -> str:
-    """
-    Searches the Alumni Petra database for a list of job vacancies. Jobs are shown in a numbered list format. For each job you must explain why that job matches user's RIASEC result.
-    If the user seems to be interested in certain jobs or want to explore other options related to their RIASEC test result and preferences, use this tool as well.
-    """
-
-    try:
-
-        keyword = list(top_3[0].keys())[0] + ", " + list(top_3[1].keys())[0] + ", " + list(top_3[2].keys())[0]
-        print("Keyword:", keyword)
-        if 'preference' in riasec_result_data.columns and not riasec_result_data['preference'].empty:
-            preferences = set(riasec_result_data['preference'].iloc[0].split(", "))
-            keyword += ", " + ", ".join(preferences)
-        print("Keywords:", keyword)
-    
-        relevant_jobs = get_relevant_jobs(keyword)
-        relevant_slugs = relevant_jobs['Link'].map(lambda x: x[35:]).to_numpy()
-        idx = 1
-        output = ""
-        for slug in relevant_slugs:
-            if idx > 5:
-                break
-            r = requests.get(f'https://panel-alumni.petra.ac.id/api/vacancy/{slug}')
-            print(r, f'for link: https://panel-alumni.petra.ac.id/api/vacancy/{slug}')
-            if r.status_code != 200:
-                continue
-            data = r.json()
-            print(data["vacancy"]["salary_start"])
-            salary_start = data['vacancy']['salary_start'] if data['vacancy']['salary_start'] is not None else ''
-            print("salary start:", salary_start)
-            print(data["vacancy"]["salary_end"])
-            salary_end = data['vacancy']['salary_end'] if data['vacancy']['salary_end'] is not None else ''
-            print("salary end:", salary_end)
-            salary_info = f"{salary_start} - {salary_end}" if salary_start or salary_end else 'Tidak ada informasi'
-            print("salary info:", salary_info)
-            output += f"""
-                {idx}. {data['vacancy']['position_name']} at {data['vacancy']['mh_company']['name']}
-                Lokasi: {data['vacancy']['mh_city']['name']}
-                Tipe: {data['vacancy']['type']}
-                Sistem: {data['vacancy']['system']}
-                Level Pendidikan: {data['vacancy']['level_education']}
-                Range Gaji: {salary_info}
-                Batas Apply: {data['vacancy']["expired_date"]}
-                Deskripsi: {BeautifulSoup(data['vacancy']['description'], 'html.parser').get_text() if data['vacancy']['description'] is not None else ''}
-                Job Requirements: {BeautifulSoup(data['vacancy']['requirement'], 'html.parser').get_text() if data['vacancy']['requirement'] is not None else ''}
-                <A reason why this job match user's RIASEC result (Why {data['vacancy']['position_name']} match {keyword})>
-                Link: https://alumni.petra.ac.id/vacancy/{slug} [ALWAYS SHOW URL TO USER]
-            """
-            idx += 1
-        output += "\n\nShow it directly to user with location, type, system, educational level, salary range, application deadline, description, job requirements, reason why that job match user RIASEC result, and URL of the job posting. DON'T call other tools again."
-        return output
-    except Exception as e:
-        return f"Error fetching jobs: {str(e)}"
-
-async def provide_topic_for_educational_content():
-    """
-    You are a topic generation expert. Your task is to:
-    1. Take a user's RIASEC test result as input.
-    2. Identify the most relevant occupations suited for the given RIASEC profile.
-    3. Generate a topic for educational content that would help the user prepare for those occupations.
-    Output the topic in a single sentence, focusing on specific skills, knowledge, or training areas.
-
-    """
-
-    this_system_prompt = """
-    You are a topic generation expert. Your task is to:
-    1. Take a user's RIASEC test result as input.
-    2. Identify the most relevant occupations suited for the given RIASEC profile.
-    3. Generate a topic for educational content that would help the user prepare for those occupations.
-    Output the topic in a single sentence, focusing on specific skills, knowledge, or training areas.
-
-    """
-
-    holland_docs = SimpleDirectoryReader("docs").load_data()
-    index = VectorStoreIndex.from_documents(holland_docs)
-    query_engine = index.as_query_engine(
-        chat_mode="context",
-        memory=memory,
-        system_prompt = this_system_prompt,
-        verbose=True
-    )
-
-    response = query_engine.query(f"Generate a topic for {top_3}")
-
-    return response
-    
-    
-
-async def search_educational_content(topic: str):
-    """Search for educational content based on user job recommendation using DuckDuckGo. Call other tool to provide a topic."""
-
-    try:
-        with DDGS() as ddg:
-            results = ddg.text(f"educational content for {topic} {datetime.now().strftime('%Y-%m')}", max_results=1)
-            if results:
-                print(results)
-                educational_content = "\n\n".join([
-                    f"Title: {result['title']}\nURL: {result['href']}\nSummary: {result['body']}" 
-                    for result in results
-                ])
-                educational_content += f"Show to user the summary and reason why the content match user RIASEC result ({top_3}). ALWAYS show user the URL. DON'T call other tools again."
-                return educational_content
-            return f"No educational content found for {top_3}."
-    except Exception as e:
-        return f"Error fetching educational content. {str(e)}"
-
-async def get_job_details(job_slug: str):
-    """Fetch detailed information about a specific job based on its slug."""
-    try:
-        r = requests.get(f'https://panel-alumni.petra.ac.id/api/vacancy/{job_slug}')
-        if r.status_code == 200:
-            data = r.json()
-            salary_start = data['vacancy']['salary_start'] or ''
-            salary_end = data['vacancy']['salary_end'] or ''
-            salary_info = f"{salary_start} - {salary_end}" if salary_start or salary_end else 'Tidak ada informasi'
-
-            return f"""
-            {data['vacancy']['position_name']} at {data['vacancy']['mh_company']['name']}
-            Lokasi: {data['vacancy']['mh_city']['name']}
-            Tipe: {data['vacancy']['type']}
-            Sistem: {data['vacancy']['system']}
-            Level Pendidikan: {data['vacancy']['level_education']}
-            Range Gaji: {salary_info}
-            Batas Apply: {data['vacancy']['expired_date']}
-            Deskripsi: {BeautifulSoup(data['vacancy']['description'], 'html.parser').get_text()}
-            Job Requirements: {BeautifulSoup(data['vacancy']['requirement'], 'html.parser').get_text()}
-            <Provide a reason why this job match user's RIASEC result and preference ({keyword})
-            Link: https://alumni.petra.ac.id/vacancy/{job_slug} [ALWAYS SHOW THIS TO USER]
-            """
-        else:
-            return f"Failed to fetch details for job ID: {job_slug}"
-    except Exception as e:
-        return f"Error fetching job details: {str(e)}"
-        
-alumni_job_tool = FunctionTool.from_defaults(async_fn=search_job_vacancy)
-educational_content_tool = FunctionTool.from_defaults(async_fn=search_educational_content)
-record_preference_tool = FunctionTool.from_defaults(async_fn=record_new_preference)
-job_detail_tool = FunctionTool.from_defaults(async_fn=get_job_details)
-provide_topic_tool = FunctionTool.from_defaults(async_fn=provide_topic_for_educational_content)
-
-tools = [record_preference_tool, alumni_job_tool, job_detail_tool, provide_topic_tool, educational_content_tool]
+# The tools live in agents/search_tools.py and share one SearchSession per chat. It is kept in
+# st.session_state because the agent's tools stay bound to it across reruns, so per-turn state
+# like the vacancy card container must be set on it rather than on a module global of this page.
+if "search_session_job" not in st.session_state:
+    st.session_state.search_session_job = SearchSession(riasec_result_data)
+search_session = st.session_state.search_session_job
+tools = build_tools(search_session)
 
 
 # Main Program
@@ -307,23 +162,32 @@ if "messages_job" not in st.session_state:
          "content": "Hello! I can provide you with jobs or educational content based on your RIASEC result! 😊"}
     ]
 
+# Keep the local vacancy mirror fresh, the tools read vacancies from it
+vacancy_mirror.sync_in_background()
+
 # Initialize the chat engine
 if "chat_engine_job" not in st.session_state.keys():
     # Initialize with custom chat history
     init_history = [
         ChatMessage(role=MessageRole.ASSISTANT, content="Halo! Mau cari lowongan pekerjaan apa?"),
     ]
-    memory = ChatMemoryBuffer.from_defaults(token_limit=32768)
-
-    st.session_state.chat_engine_job = ReActAgent.from_tools(
-        tools,
-        chat_mode="react",
-        verbose=True,
-        memory=memory,
-        react_system_prompt=react_system_prompt,
-        # retriever=retriever,
-        llm=Settings.llm
-    )
+    # Bounded history: the latest turns verbatim plus a rolling summary of the older ones
+    memory = RollingSummaryMemory.from_budget(model_provider.get_llm(temperature=0))
+    search_session.memory = memory
+
+    if SEARCH_AGENT_MODE == "parallel":
+        # Plans every independent tool call of a step at once and runs them concurrently
+        st.session_state.chat_engine_job = ParallelToolAgent(tools, Settings.llm, memory, system_prompt, verbose=True, stateful_tools=STATEFUL_TOOLS)
+    else:
+        st.session_state.chat_engine_job = ReActAgent.from_tools(
+            tools,
+            chat_mode="react",
+            verbose=True,
+            memory=memory,
+            react_system_prompt=react_system_prompt,
+            # retriever=retriever,
+            llm=Settings.llm
+        )
 
 # Display chat messages from history on app rerun
 for message in st.session_state.messages_job:
@@ -335,17 +199,60 @@ if prompt := st.chat_input("What is up?"):
     with st.chat_message("user"):
         st.markdown(prompt)
 
+    # Stated preferences are recorded by rules, small talk skips the agent and its tools
+    intent, preferences = intent_router.route(prompt)
+    for preference in preferences:
+        search_session.add_preference(preference)
+
+    # Same question, same RIASEC profile and preferences, same previous answer: answer from the cache
+    previous_answer = st.session_state.messages_job[-1]["content"]
+    profile = search_session.profile()
+    cached_response, query_embedding = None, None
+    if intent == "tools":
+        try:
+            cached_response, query_embedding = response_cache.lookup(prompt, profile, previous_answer)
+        except Exception as e:
+            print(f"Response cache lookup failed: {e}")
+
     # Add user message to chat history
     st.session_state.messages_job.append({"role": "user", "content": prompt})
 
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
+        if intent == "small_talk":
+            memory = st.session_state.chat_engine_job.memory
+            messages = [ChatMessage(role=MessageRole.SYSTEM, content=system_prompt)] + memory.get() + [ChatMessage(role=MessageRole.USER, content=prompt)]
             try:
-                response_stream = st.session_state.chat_engine_job.stream_chat(prompt)
-                st.write_stream(response_stream.response_gen)
-                 # Add user message to chat history
-                st.session_state.messages_job.append({"role": "assistant", "content": response_stream.response})
+                response = st.write_stream(chunk.delta for chunk in Settings.llm.stream_chat(messages))
+                memory.put(ChatMessage(role=MessageRole.USER, content=prompt))
+                memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=response))
             except Exception as e:
                 response = "Unable to process your request. Please try again."
                 st.write(response)
-                st.session_state.messages_job.append({"role": "assistant", "content": response})
\ No newline at end of file
+            st.session_state.messages_job.append({"role": "assistant", "content": response})
+        elif cached_response is not None:
+            st.markdown(cached_response)
+            st.session_state.chat_engine_job.memory.put(ChatMessage(role=MessageRole.USER, content=prompt))
+            st.session_state.chat_engine_job.memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=cached_response))
+            st.session_state.messages_job.append({"role": "assistant", "content": cached_response})
+        else:
+            search_session.start_turn(st.container() if STREAM_VACANCY_CARDS else None)
+            with st.spinner("Thinking..."):
+                try:
+                    response_stream = st.session_state.chat_engine_job.stream_chat(prompt)
+                    st.write_stream(response_stream.response_gen)
+                    # Add user message to chat history, with the vacancy cards shown during the turn
+                    response = "\n".join(search_session.end_turn() + [response_stream.response])
+                    st.session_state.messages_job.append({"role": "assistant", "content": response})
+                except Exception as e:
+                    search_session.end_turn()
+                    response = "Unable to process your request. Please try again."
+                    st.write(response)
+                    st.session_state.messages_job.append({"role": "assistant", "content": response})
+                else:
+                    # The answer is already shown, a failing cache write must not add an error message to it
+                    try:
+                        tools_used = {source.tool_name for source in response_stream.sources}
+                        if not tools_used & STATEFUL_TOOLS:
+                            response_cache.store(prompt, profile, response, previous_answer, tool_dependent=bool(tools_used), embedding=query_embedding)
+                    except Exception as e:
+                        print(f"Response cache store failed: {e}")
@@ -5,7 +5,7 @@ from llama_index.vector_stores.qdrant import QdrantVectorStore
 from llama_index.core.storage.storage_context import StorageContext
 from llama_index.core import SimpleDirectoryReader, VectorStoreIndex, Settings
 from llama_index.readers.json import JSONReader
-from llama_index.embeddings.ollama import OllamaEmbedding
+from agents import model_provider
 
 
 def upload_files(files, path):
@@ -94,7 +94,7 @@ if "chatbot" not in st.session_state:
 else:
     chatbot = st.session_state.chatbot
     st.session_state.client = chatbot.client
-Settings.embed_model = OllamaEmbedding(base_url = 'http://127.0.0.1:11434', model_name="mxbai-embed-large:latest")
+Settings.embed_model = model_provider.get_embed_model()
 
 tab1, tab2 = st.tabs(["Upload", "Management"])
 with tab1:
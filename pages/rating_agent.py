@@ -5,7 +5,8 @@ import pandas as pd
 import csv
 import time
 import pandas as pd
-import requests
+from agents import petra_client
+from agents.job_catalog import load_job_catalog
 
 load_dotenv()
 MODEL = "llama3.2:latest"
@@ -48,8 +49,7 @@ def load_csv_slugs():
         return slugs
 
 def load_xlsx_jobs():
-    file_path = 'pages/jobs.xlsx' 
-    data = pd.read_excel(file_path)
+    data = load_job_catalog('pages/jobs.xlsx')
     data["rating"] = 0
     return data     
     
@@ -60,8 +60,7 @@ def get_relevant_jobs(keyword):
         job_position = str(jobs.loc[index, "Position"])
         rating = get_compability_rating(keyword, job_position)
         slug = jobs.loc[index, "Link"][35:]
-        api_link = f'https://panel-alumni.petra.ac.id/api/vacancy/{slug}'
-        r = requests.get(api_link)
+        r = petra_client.get(f'/api/vacancy/{slug}')
         if (r.status_code != 200):
             rating = 0
         print(rating)
@@ -2,9 +2,14 @@ from llama_index.llms.ollama import Ollama
 from llama_index.embeddings.ollama import OllamaEmbedding
 from llama_index.core import VectorStoreIndex, SimpleDirectoryReader
 from llama_index.core import Settings
-from llama_index.core.memory import ChatMemoryBuffer
 import streamlit as st
 import pandas as pd
+import os
+import sys
+
+# streamlit only puts pages_trash/ on the path, the agents package lives one level up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from agents.summary_memory import RollingSummaryMemory
 
 riasec_result_data = pd.read_csv('answers/riasec_assessment_answer.csv')
 riasec_result_key_values = [{row['Type']: row['Total Score']} for index, row in riasec_result_data.iterrows()]
@@ -40,7 +45,7 @@ if "messages_riasec" not in st.session_state:
 
 if "chat_engine_riasec" not in st.session_state:
 
-    memory = ChatMemoryBuffer.from_defaults(token_limit=50384)
+    memory = RollingSummaryMemory.from_budget(Settings.llm)
     st.session_state.chat_engine_riasec = index.as_chat_engine(
     chat_mode="context",
     memory=memory,
@@ -8,12 +8,19 @@ from llama_index.core.memory import ChatMemoryBuffer
 from llama_index.core.tools import FunctionTool
 from llama_index.core.agent import ReActAgent
 from llama_index.core import PromptTemplate
-from bs4 import BeautifulSoup
 import pandas as pd
 import nest_asyncio
 import logging
-import requests
+import os
 import sys
+
+# Runs from temp/, the agents package lives one level up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from agents.html_text import html_to_text
+from agents import petra_client
+from agents import location_index
+from agents import vacancy_mirror
+from agents.vacancy_details import fetch_vacancy
 nest_asyncio.apply()
 
 system_prompt = """
@@ -109,6 +116,8 @@ logging.getLogger().addHandler(logging.StreamHandler(stream=sys.stdout))
 Settings.llm = Ollama(model="llama3.1:8b-instruct-q4_0", base_url="http://127.0.0.1:11434", system_prompt=system_prompt, temperature=0)
 Settings.embed_model = OllamaEmbedding(base_url="http://127.0.0.1:11434", model_name="mxbai-embed-large:latest")
 
+vacancy_mirror.sync_in_background()
+
 # Main Program
 st.title("Search for Jobs On Alumni Website! 🔍")
 
@@ -126,11 +135,10 @@ async def get_id_mh_province(provinces:str) -> str:
     """
     Use this tool if user specify the province, NOT the city. Returns province ID from user query. The province ID from this tool will be used for the tool 'search_job_vacancy'
     """
-    r = requests.get('https://panel-alumni.petra.ac.id/api/province')
-    data = r.json()
-    for d in data['provinces']:
-        if provinces.lower() == d['name'].lower():
-            return d['id']
+    # Answered from the local location index, which also understands names like "Jatim" and city names
+    province = location_index.find_province(provinces) or location_index.province_of_city(provinces)
+    if province is not None:
+        return province['id']
     return ""
             
     
@@ -141,26 +149,30 @@ async def search_job_vacancy(keyword: str, start_salary:int = 500000, end_salary
     show_explaination by default MUST be true, except if the user wanted the details of the job it should be false.
     """
 
-    r = requests.get('https://panel-alumni.petra.ac.id/api/vacancy', {
-        "page": 1,
-        "type": "freelance,fulltime,parttime,internship",
-        "system": "onsite,remote,hybrid",
-        "level_education": "diploma,sarjana,magister,doktor",
-        "keyword": keyword,
-        "salary_range": str(start_salary) + ", " + str(end_salary),
-        "id_mh_province": id_mh_province,
-        "id_mh_city": "",
-        "perPage": 5,
-        "orderBy": "updated_at",
-        "order": "DESC",
-        "skills": "",
-        "prody": "",
-    })
-
-    data = r.json()
+    # The local mirror answers without a network call, the API is only asked before the first sync
+    if vacancy_mirror.is_populated():
+        vacancies = vacancy_mirror.search(keyword, limit=5, start_salary=start_salary, end_salary=end_salary, id_mh_province=id_mh_province)
+    else:
+        r = petra_client.get('/api/vacancy', {
+            "page": 1,
+            "type": "freelance,fulltime,parttime,internship",
+            "system": "onsite,remote,hybrid",
+            "level_education": "diploma,sarjana,magister,doktor",
+            "keyword": keyword,
+            "salary_range": str(start_salary) + ", " + str(end_salary),
+            "id_mh_province": id_mh_province,
+            "id_mh_city": "",
+            "perPage": 5,
+            "orderBy": "updated_at",
+            "order": "DESC",
+            "skills": "",
+            "prody": "",
+        })
+        vacancies = r.json()["vacancies"]["data"]
+
     output = f"# Job results for '{keyword}'"
     idx = 1
-    for d in data["vacancies"]["data"]:
+    for d in vacancies:
         salary_start = d['salary_start'] if d['salary_start'] is not None else ''
         salary_end = d['salary_end'] if d['salary_end'] is not None else ''
         if(not salary_start and not salary_end):
@@ -176,8 +188,8 @@ async def search_job_vacancy(keyword: str, start_salary:int = 500000, end_salary
                         Level Pendidikan = {d['level_education']}
                         Range Gaji = {salary_info}
                         Batas Apply = {d["expired_date"]}
-                        Deskripsi = {BeautifulSoup(d['description'], 'html.parser').get_text()}
-                        Job Requirements = {BeautifulSoup(d['requirement'], 'html.parser').get_text()}
+                        Deskripsi = {html_to_text(d['description'])}
+                        Job Requirements = {html_to_text(d['requirement'])}
                         slug = {d['slug']} (DO NOT show this to the user)
                         """
         else:
@@ -193,7 +205,7 @@ async def search_job_vacancy(keyword: str, start_salary:int = 500000, end_salary
                         """
         
         idx+=1
-    if len(data["vacancies"]["data"]) ==0:
+    if len(vacancies) ==0:
         output += "No results found."
 
     output += "\n\n Show this result to user DIRECTLY, with NO summarization but FORMAT IT NICELY. If it returns nothing, say to user that NO JOBS are available for user query."
@@ -207,8 +219,9 @@ async def get_job_vacancy_slug_detail(slug: str) -> str:
         Provides detailed information regarding the vacancy. slug must be a specific vacancy slug.
     """
     
-    r = requests.get(f"https://panel-alumni.petra.ac.id/api/vacancy/{slug}")
-    data = r.json()["vacancy"]
+    data = fetch_vacancy(slug)
+    if data is None:
+        return f"Failed to fetch details for job ID: {slug}"
     salary_start = data['salary_start'] if data['salary_start'] is not None else ''
     salary_end = data['salary_end'] if data['salary_end'] is not None else ''
     if(not salary_start and not salary_end):
@@ -216,7 +229,7 @@ async def get_job_vacancy_slug_detail(slug: str) -> str:
     else:
         salary_info = str(salary_start) + " - " + str(salary_end)
     
-    return f"Pekerjaan ini adalah sebagai {data['position_name']} di {data['mh_company']['name']} di kota {data['mh_city']['name']} dengan sistem {data['system']} dan tipe {data['type']} dengan range gaji {salary_info}. Untuk apply, anda harus memiliki level pendidikan {data['level_education']}. Di dalam pekerjaan ini user akan mengerjakan beberapa job description, yaitu: {BeautifulSoup(data['description'], 'html.parser').get_text()}. Untuk mendaftar ke pekerjaan ini, user harus memiliki requirements sebagai berikut: {BeautifulSoup(data['requirement'], 'html.parser').get_text()}. Batas apply ke pekerjaan ini adalah {data['expired_date']}"
+    return f"Pekerjaan ini adalah sebagai {data['position_name']} di {data['mh_company']['name']} di kota {data['mh_city']['name']} dengan sistem {data['system']} dan tipe {data['type']} dengan range gaji {salary_info}. Untuk apply, anda harus memiliki level pendidikan {data['level_education']}. Di dalam pekerjaan ini user akan mengerjakan beberapa job description, yaitu: {html_to_text(data['description'])}. Untuk mendaftar ke pekerjaan ini, user harus memiliki requirements sebagai berikut: {html_to_text(data['requirement'])}. Batas apply ke pekerjaan ini adalah {data['expired_date']}"
 
     
 search_job_vacancy_tool = FunctionTool.from_defaults(async_fn=search_job_vacancy) 
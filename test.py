@@ -1,4 +1,4 @@
-import requests
+from agents import petra_client
 from bs4 import BeautifulSoup
 import csv
 
@@ -7,7 +7,7 @@ def search_job_vacancy_riasec(keyword: str = "", start_salary:int = 5000, end_sa
     Searches the Alumni Petra database for a list of job vacancies. If a province is specified, retrieve its ID first. Jobs are shown in a numbered list format, with an explanation if requested.
     """
     print("Requesting to alumni petra website...")
-    r = requests.get('https://panel-alumni.petra.ac.id/api/vacancy', {
+    r = petra_client.get('/api/vacancy', {
         "page": 1,
         "type": "freelance,fulltime,parttime,internship",
         "system": "onsite,remote,hybrid",
@@ -37,6 +37,7 @@ def search_job_vacancy_riasec(keyword: str = "", start_salary:int = 5000, end_sa
     return output
 
 slugs = search_job_vacancy_riasec('')
+petra_client.print_latency_stats()
 with open('alumni_job_slugs.csv', 'w', newline='') as csvfile:
     fieldnames = ['slug']
     writer = csv.DictWriter(csvfile, fieldnames=fieldnames)